@@ -1,4 +1,7 @@
 """Questionnaire Agent API."""
+import time
+_import_started = time.perf_counter()
+import logging
 import sys
 from pathlib import Path
 backend_dir = Path(__file__).resolve().parent
@@ -8,9 +11,14 @@ if str(backend_dir) not in sys.path:
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from src.core.database import Base, engine
+from src.core.config import settings
+from src.core.database import init_db
+from src.core.warmup import warm_up
+from src.storage.vector_store import get_vector_store_service
+from src.utils.loaders import shutdown_loader_pool
+from src.utils.uploads import UPLOAD_FORM_OVERHEAD, UploadSizeLimitMiddleware
 from src.models.db_models import (
-    DocumentRegistry, Project, Question, Answer, Citation,
+    DocumentRegistry, EmbeddingCache, AnswerCache, Project, Question, Answer, Citation,
     Request, EvaluationRun, EvaluationResult,
 )
 from src.api.documents import router as documents_router
@@ -18,11 +26,26 @@ from src.api.requests import router as requests_router
 from src.api.projects import router as projects_router
 from src.api.answers import router as answers_router
 from src.api.evaluation import router as evaluation_router
+from src.api.metrics import router as metrics_router
+from src.workers.runner import Worker
+
+logger = logging.getLogger(__name__)
+_import_ms = (time.perf_counter() - _import_started) * 1000
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    logger.info("API modules imported in %.0f ms (python -m src.core.warmup for a per-package report)", _import_ms)
+    init_db()
+    get_vector_store_service().ensure_indexes()
+    if settings.STARTUP_WARMUP:
+        await warm_up(loaders=settings.EMBEDDED_WORKER)
+    worker = Worker() if settings.EMBEDDED_WORKER else None
+    if worker:
+        worker.start()
     yield
+    if worker:
+        worker.stop(timeout=5)
+    shutdown_loader_pool()
 
 app = FastAPI(title="Questionnaire Agent API", lifespan=lifespan)
 app.add_middleware(
@@ -32,11 +55,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(UploadSizeLimitMiddleware, limits={
+    "/api/documents/index-async": settings.MAX_UPLOAD_SIZE + UPLOAD_FORM_OVERHEAD,
+    "/api/projects/create-async": settings.MAX_UPLOAD_SIZE + UPLOAD_FORM_OVERHEAD,
+    "/api/documents/bulk-index-async": settings.MAX_BULK_UPLOAD_SIZE,
+})
 app.include_router(documents_router, prefix="/api")
 app.include_router(requests_router, prefix="/api")
 app.include_router(projects_router, prefix="/api")
 app.include_router(answers_router, prefix="/api")
 app.include_router(evaluation_router, prefix="/api")
+app.include_router(metrics_router)
 
 @app.get("/health")
 def health_check():
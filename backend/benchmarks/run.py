@@ -0,0 +1,203 @@
+"""Offline pipeline benchmark: python -m benchmarks.run (from backend/)
+
+Runs the real ingestion, parsing, retrieval, generation and evaluation code against Postgres/pgvector with
+deterministic local stand-ins for the OpenAI models. The benchmark database is wiped first, so it must be a
+dedicated one (--database-url / BENCHMARK_DATABASE_URL), never the application's DATABASE_URL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, List, Optional
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_DATA_DIR = BACKEND_DIR.parent / "data"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+class Stage:
+    def __init__(self, name: str, unit: str):
+        self.name, self.unit = name, unit
+        self.latencies: List[float] = []
+        self.items = 0
+
+    def measure(self, fn: Callable[[], int]):
+        t = time.perf_counter()
+        items = fn()
+        self.latencies.append(time.perf_counter() - t)
+        self.items += items
+
+    def summary(self) -> dict:
+        lat = np.asarray(self.latencies) * 1000
+        seconds = float(lat.sum() / 1000)
+        return {"unit": self.unit, "samples": len(lat), "items": self.items, "seconds": round(seconds, 3), "throughput": round(self.items / seconds, 3) if seconds else 0.0, "p50_ms": round(float(np.percentile(lat, 50)), 2), "p95_ms": round(float(np.percentile(lat, 95)), 2)}
+
+def _reset_database():
+    from sqlalchemy import text
+    from src.core.config import settings
+    from src.core.database import Base, engine, init_db
+    from src.models import db_models  # noqa: F401  (registers the tables for drop_all)
+    from src.storage.vector_store import get_vector_store_service
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS "{settings.VECTOR_STORE_TABLE_NAME}"'))
+    Base.metadata.drop_all(engine)
+    init_db()
+    get_vector_store_service().ensure_indexes().join()
+
+def _find_inputs(data_dir: Path, questionnaire: Optional[str]):
+    pdfs = sorted(data_dir.glob("*.pdf"))
+    q = next((p for p in pdfs if p.name == questionnaire), None) if questionnaire else next((p for p in pdfs if "questionnaire" in p.name.lower()), None)
+    if q is None:
+        raise SystemExit(f"No questionnaire PDF found in {data_dir}")
+    evidence = [p for p in pdfs if p != q]
+    if not evidence:
+        raise SystemExit(f"No evidence PDFs found in {data_dir}")
+    return evidence, q
+
+async def _answer_questions(stage: Stage, question_ids: List[int]):
+    from src.core.database import AsyncSessionLocal
+    from src.services.answer_service import agenerate_answer_for_question
+    async with AsyncSessionLocal() as adb:
+        for qid in question_ids:
+            t = time.perf_counter()
+            await agenerate_answer_for_question(adb, qid)
+            stage.latencies.append(time.perf_counter() - t)
+            stage.items += 1
+
+async def _agenerate_answers(project_id: int, concurrency: Optional[int]) -> dict:
+    from src.core.database import AsyncSessionLocal
+    from src.services.answer_service import agenerate_answers_for_project
+    async with AsyncSessionLocal() as adb:
+        return await agenerate_answers_for_project(adb, project_id, concurrency=concurrency)
+
+def run_benchmark(args) -> dict:
+    from src.core.config import settings
+    from src.core.database import SessionLocal
+    from src.models.db_models import Answer, Question
+    from src.services.answer_service import generate_answers_for_project
+    from src.services.evaluation_service import run_evaluation
+    from src.services.ingestion_service import run_indexing_and_registry
+    from src.services.project_service import create_project_from_parsed
+    from src.services.questionnaire_parser import parse_questionnaire_file
+    from src.utils.aio import run_coroutine_sync
+    evidence, questionnaire = _find_inputs(Path(args.data_dir), args.questionnaire)
+    stages = {name: Stage(name, unit) for name, unit in (("index", "chunks"), ("parse", "questions"), ("answer", "questions"), ("generate", "questions"), ("evaluate", "answers"))}
+    db = SessionLocal()
+    try:
+        for _ in range(args.repeats):
+            for pdf in evidence:
+                # A fresh document_id each round, so repeats index again instead of hitting the content-hash dedup.
+                stages["index"].measure(lambda: sum(run_indexing_and_registry(db, str(pdf), pdf.name, str(uuid.uuid4()))[1:]))
+        parsed = []
+
+        def parse() -> int:
+            parsed[:] = parse_questionnaire_file(str(questionnaire), questionnaire.name)
+            return len(parsed)
+
+        for _ in range(args.repeats):
+            stages["parse"].measure(parse)
+        project = create_project_from_parsed(db, name="benchmark", parsed=parsed, scope="ALL_DOCS")
+        project_id = project.id
+        question_ids = [qid for (qid,) in db.query(Question.id).filter(Question.project_id == project_id).order_by(Question.order_index).limit(args.questions)]
+        db.rollback()
+        asyncio.run(_answer_questions(stages["answer"], question_ids))
+        for _ in range(args.repeats):
+            if settings.ASYNC_GENERATION:
+                stages["generate"].measure(lambda: run_coroutine_sync(_agenerate_answers(project_id, args.concurrency))["total"])
+            else:
+                stages["generate"].measure(lambda: generate_answers_for_project(db, project_id, concurrency=args.concurrency)["total"])
+        # Deterministic "human" answers (first half of each AI answer) so every answer gets scored.
+        for a in db.query(Answer).join(Question).filter(Question.project_id == project_id):
+            words = (a.ai_answer_text or "").split()
+            a.human_answer_text = " ".join(words[: max(1, len(words) // 2)]) or "n/a"
+        db.commit()
+        for _ in range(args.repeats):
+            stages["evaluate"].measure(lambda: len(run_evaluation(db, project_id).results))
+    finally:
+        db.close()
+    return {"config": _config(args), "stages": {name: s.summary() for name, s in stages.items() if s.latencies}}
+
+def _config(args) -> dict:
+    # Results are only comparable with a baseline recorded under the same workload.
+    from src.core.config import settings
+    return {"repeats": args.repeats, "questions": args.questions, "concurrency": args.concurrency, "embed_latency_ms": args.embed_latency_ms, "embed_per_text_ms": args.embed_per_text_ms, "llm_latency_ms": args.llm_latency_ms, "with_caches": args.with_caches, "async_generation": settings.ASYNC_GENERATION, "generation_batch_size": settings.GENERATION_BATCH_SIZE, "retrieval_hybrid": settings.RETRIEVAL_HYBRID}
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, base in baseline["stages"].items():
+        cur = results["stages"].get(name)
+        if cur is None:
+            continue
+        if cur["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {cur['throughput']:.2f} {cur['unit']}/s < baseline {base['throughput']:.2f}")
+        if cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {cur['p95_ms']:.1f} ms > baseline {base['p95_ms']:.1f} ms")
+    return regressions
+
+def _print_table(results: dict, baseline: Optional[dict]):
+    base = (baseline or {}).get("stages", {})
+    print(f"{'stage':<10}{'samples':>8}{'items':>8}{'throughput':>22}{'p50 ms':>10}{'p95 ms':>10}{'baseline p95':>14}")
+    for name, s in results["stages"].items():
+        b = base.get(name, {}).get("p95_ms")
+        throughput = f"{s['throughput']:.2f} {s['unit']}/s"
+        print(f"{name:<10}{s['samples']:>8}{s['items']:>8}{throughput:>22}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{'' if b is None else f'{b:.1f}':>14}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("BENCHMARK_DATABASE_URL"), help="dedicated Postgres database; wiped on every run")
+    parser.add_argument("--data-dir", default=str(DEFAULT_DATA_DIR))
+    parser.add_argument("--questionnaire", help="questionnaire file name in --data-dir (default: first PDF named *questionnaire*)")
+    parser.add_argument("--repeats", type=int, default=3, help="rounds of the index, parse, generate and evaluate stages")
+    parser.add_argument("--questions", type=int, default=20, help="questions answered one by one in the answer stage")
+    parser.add_argument("--concurrency", type=int, default=None, help="project generation concurrency (default: GENERATION_CONCURRENCY)")
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0, help="simulated latency per embedding call")
+    parser.add_argument("--embed-per-text-ms", type=float, default=0.2, help="simulated extra latency per embedded text")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="simulated latency per chat completion")
+    parser.add_argument("--with-caches", action="store_true", help="keep the embedding/answer caches and answer reuse enabled")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression before failing")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+    if not args.database_url:
+        parser.error("set --database-url or BENCHMARK_DATABASE_URL to a dedicated database (it is wiped)")
+    os.environ["DATABASE_URL"] = args.database_url
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    from src.core.config import settings
+    from src.utils.loaders import shutdown_loader_pool
+    from benchmarks.standins import install_standins
+    if not args.with_caches:
+        settings.EMBEDDING_CACHE_ENABLED = settings.ANSWER_CACHE_ENABLED = settings.ANSWER_REUSE_ENABLED = False
+    install_standins(args.embed_latency_ms, args.embed_per_text_ms, args.llm_latency_ms)
+    try:
+        _reset_database()
+        results = run_benchmark(args)
+    finally:
+        shutdown_loader_pool()
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.is_file() else None
+    _print_table(results, baseline)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + "\n")
+    if args.update_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline written to {baseline_path}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {baseline_path}; run with --update-baseline to record one.")
+        return 0
+    if baseline.get("config") != results["config"]:
+        print(f"Baseline config {baseline.get('config')} differs from this run {results['config']}; not comparable.")
+        return 2
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import json
+import math
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TOKEN = re.compile(r"\w+")
+_CHUNK = re.compile(r"\[(chunk_\d+)\]\n(.*?)(?=\n\n---\n\n\[chunk_\d+\]|\n\nQuestions?:|\Z)", re.DOTALL)
+_QUESTION = re.compile(r"^\[(Q\d+)\] ", re.MULTILINE)
+
+class LocalEmbeddings(Embeddings):
+    """Deterministic stand-in for OpenAIEmbeddings: L2-normalised feature-hashed bag of words, so lexically similar texts are close."""
+
+    def __init__(self, size: int = 1536, latency_ms: float = 0.0, per_text_ms: float = 0.0):
+        self.size, self.latency_ms, self.per_text_ms = size, latency_ms, per_text_ms
+
+    def _vector(self, text: str) -> List[float]:
+        v = [0.0] * self.size
+        for token in _TOKEN.findall(text.casefold()):
+            h = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            v[int.from_bytes(h[:4], "little") % self.size] += 1.0 if h[4] & 1 else -1.0
+        norm = math.sqrt(sum(x * x for x in v)) or 1.0
+        return [x / norm for x in v]
+
+    def _delay(self, n: int) -> float:
+        return (self.latency_ms + self.per_text_ms * n) / 1000
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._delay(len(texts)))
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self._delay(len(texts)))
+        return [self._vector(t) for t in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+class LocalChatModel(BaseChatModel):
+    """Deterministic stand-in for ChatOpenAI: answers in the app's JSON format from the first context chunk after a fixed delay.
+    Batched prompts get one answer per question, the n-th question from the n-th chunk."""
+
+    latency_ms: float = 0.0
+    stream_chunk_chars: int = 8
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-standin"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        prompt = str(messages[-1].content)
+        chunks = _CHUNK.findall(prompt)
+        if not chunks:
+            return json.dumps({"answer": "The context does not cover this question.", "answerable": False, "confidence": 0.1, "citations": []})
+        questions = _QUESTION.findall(prompt)
+        if questions:
+            return json.dumps({"answers": [{"id": q, **self._answer(*chunks[min(i, len(chunks) - 1)])} for i, q in enumerate(questions)]})
+        return json.dumps(self._answer(*chunks[0]))
+
+    def _answer(self, chunk_id: str, text: str) -> dict:
+        snippet = " ".join(text.split())[:200]
+        return {"answer": snippet, "answerable": True, "confidence": 0.8, "citations": [{"chunk_id": chunk_id, "snippet": snippet[:120]}]}
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        reply, n = self._reply(messages), self.stream_chunk_chars
+        for i in range(0, len(reply), n):
+            time.sleep(self.latency_ms / 1000 * n / len(reply))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=reply[i:i + n]))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        reply, n = self._reply(messages), self.stream_chunk_chars
+        for i in range(0, len(reply), n):
+            await asyncio.sleep(self.latency_ms / 1000 * n / len(reply))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=reply[i:i + n]))
+
+def install_standins(embed_latency_ms: float = 0.0, embed_per_text_ms: float = 0.0, llm_latency_ms: float = 0.0):
+    # Swaps the model factories the pipeline uses; everything else (DB, pgvector, parsing, chunking) stays real.
+    from src.core.config import settings
+    from src.services import answer_service
+    from src.storage import vector_store
+    vector_store._embedding_model = lambda: LocalEmbeddings(settings.VECTOR_SIZE, embed_latency_ms, embed_per_text_ms)
+    vector_store._vector_store_service = None
+    answer_service._get_llm = answer_service._get_async_llm = lambda: LocalChatModel(latency_ms=llm_latency_ms)
@@ -1,79 +1,77 @@
+import csv
+import io
+import json
 import os
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from sqlalchemy.orm import Session
-from src.models.db_models import Answer, Citation, Question, Project, Request, RequestTypeEnum, RequestStatusEnum, ProjectStatusEnum, AnswerStatusEnum
+from typing import AsyncIterator, Iterator, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal, SessionLocal
+from src.models.db_models import Answer, Citation, Question, Project, RequestTypeEnum, AnswerStatusEnum
 from src.models.schemas import AnswerResponse, AnswerStatus, CitationResponse, GenerateSingleAnswerResponse, RequestResponse, RequestType, RequestStatus, AnswerUpdate
-from src.services.answer_service import generate_answer_for_question
-from src.storage.database import get_db, SessionLocal
+from src.services.answer_service import MAX_THREAD_CONCURRENCY, agenerate_answer_for_question, astream_answer_for_question
+from src.storage.answer_cache import answer_cache_stats
+from src.storage.database import get_async_db, get_db
+from src.utils.sse import SSE_HEADERS, sse_event
+from src.workers.queue import enqueue_request
 
 router = APIRouter(prefix="/answers", tags=["answers"])
 
+EXPORT_BATCH_SIZE = 500
+EXPORT_CSV_COLUMNS = ["question_id", "order_index", "section_id", "section_title", "question_text", "answer_id", "status", "answer_text", "is_answerable", "confidence_score", "ai_answer_text", "manual_answer_text", "human_answer_text", "citations"]
+
+def _effective_answer_text(a: Answer) -> Optional[str]:
+    return a.manual_answer_text if a.status == AnswerStatusEnum.MANUAL_UPDATED else (a.ai_answer_text or a.answer_text)
+
 def _answer_to_response(a: Answer) -> AnswerResponse:
     cit_list = list(a.citations) if a.citations else []
-    return AnswerResponse(id=a.id, question_id=a.question_id, answer_text=a.manual_answer_text if a.status == AnswerStatusEnum.MANUAL_UPDATED else (a.ai_answer_text or a.answer_text), is_answerable=bool(a.is_answerable), confidence_score=a.confidence_score, status=AnswerStatus(a.status.value), ai_answer_text=a.ai_answer_text, manual_answer_text=a.manual_answer_text, human_answer_text=a.human_answer_text, created_at=a.created_at, updated_at=a.updated_at, citations=[CitationResponse(id=c.id, answer_id=c.answer_id, chunk_id=c.chunk_id, document_id=c.document_id, snippet=c.snippet, bounding_box_ref=c.bounding_box_ref, order_index=c.order_index) for c in cit_list])
+    return AnswerResponse(id=a.id, question_id=a.question_id, answer_text=_effective_answer_text(a), is_answerable=bool(a.is_answerable), confidence_score=a.confidence_score, status=AnswerStatus(a.status.value), ai_answer_text=a.ai_answer_text, manual_answer_text=a.manual_answer_text, human_answer_text=a.human_answer_text, reused_from_answer_id=a.reused_from_answer_id, created_at=a.created_at, updated_at=a.updated_at, citations=[CitationResponse(id=c.id, answer_id=c.answer_id, chunk_id=c.chunk_id, document_id=c.document_id, snippet=c.snippet, bounding_box_ref=c.bounding_box_ref, order_index=c.order_index) for c in cit_list])
+
+def _single_answer_response(answer: Answer, citations: List[Citation]) -> GenerateSingleAnswerResponse:
+    return GenerateSingleAnswerResponse(answer_id=answer.id, answer_text=answer.answer_text, is_answerable=bool(answer.is_answerable), confidence_score=answer.confidence_score, citations=[CitationResponse(id=c.id, answer_id=c.answer_id, chunk_id=c.chunk_id, document_id=c.document_id, snippet=c.snippet, bounding_box_ref=c.bounding_box_ref, order_index=c.order_index) for c in citations])
 
 @router.post("/generate-single", response_model=GenerateSingleAnswerResponse)
-def generate_single_answer(question_id: int, db: Session = Depends(get_db)):
-    q = db.query(Question).filter(Question.id == question_id).first()
-    if not q:
+async def generate_single_answer(question_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await db.get(Question, question_id) is None:
         raise HTTPException(status_code=404, detail="Question not found")
-    db.query(Answer).filter(Answer.question_id == question_id).delete()
-    db.commit()
-    answer, citations = generate_answer_for_question(db, question_id)
-    return GenerateSingleAnswerResponse(answer_id=answer.id, answer_text=answer.answer_text, is_answerable=bool(answer.is_answerable), confidence_score=answer.confidence_score, citations=[CitationResponse(id=c.id, answer_id=c.answer_id, chunk_id=c.chunk_id, document_id=c.document_id, snippet=c.snippet, bounding_box_ref=c.bounding_box_ref, order_index=c.order_index) for c in citations])
+    await db.execute(delete(Answer).where(Answer.question_id == question_id))
+    await db.commit()
+    return _single_answer_response(*await agenerate_answer_for_question(db, question_id))
 
-def _generate_all_task(request_id: int, project_id: int):
-    db = SessionLocal()
-    try:
-        req = db.query(Request).filter(Request.id == request_id).first()
-        if not req or req.status != RequestStatusEnum.PENDING:
-            return
-        req.status = RequestStatusEnum.RUNNING
-        db.commit()
-        proj = db.query(Project).filter(Project.id == project_id).first()
-        if proj:
-            proj.status = ProjectStatusEnum.GENERATING
-            db.commit()
-        for q in db.query(Question).filter(Question.project_id == project_id).order_by(Question.order_index).all():
-            db.query(Answer).filter(Answer.question_id == q.id).delete()
-            db.commit()
-            generate_answer_for_question(db, q.id)
-        proj = db.query(Project).filter(Project.id == project_id).first()
-        if proj:
-            proj.status = ProjectStatusEnum.COMPLETE
-            db.commit()
-        req = db.query(Request).filter(Request.id == request_id).first()
-        if req:
-            req.status = RequestStatusEnum.COMPLETED
-            req.entity_id = str(project_id)
-            req.result_payload = f'{{"project_id":{project_id}}}'
-            db.commit()
-    except Exception as e:
-        db.rollback()
-        proj = db.query(Project).filter(Project.id == project_id).first()
-        if proj:
-            proj.status = ProjectStatusEnum.OUTDATED
-            db.commit()
-        req = db.query(Request).filter(Request.id == request_id).first()
-        if req:
-            req.status = RequestStatusEnum.FAILED
-            req.error_message = str(e)
-            db.commit()
-    finally:
-        db.close()
+async def _single_answer_events(question_id: int) -> AsyncIterator[str]:
+    async with AsyncSessionLocal() as db:
+        try:
+            async for kind, value in astream_answer_for_question(db, question_id):
+                yield sse_event("token", {"text": value}) if kind == "token" else sse_event("answer", _single_answer_response(*value).model_dump_json())
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e)})
+
+@router.post("/generate-single/stream")
+async def stream_single_answer(question_id: int, db: AsyncSession = Depends(get_async_db)):
+    # SSE: "token" events carry answer text as the LLM produces it; a final "answer" event carries the saved answer.
+    if await db.get(Question, question_id) is None:
+        raise HTTPException(status_code=404, detail="Question not found")
+    await db.execute(delete(Answer).where(Answer.question_id == question_id))
+    await db.commit()
+    return StreamingResponse(_single_answer_events(question_id), media_type="text/event-stream", headers=SSE_HEADERS)
 
 @router.post("/generate-all-async", response_model=RequestResponse)
-def generate_all_answers_async(project_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def generate_all_answers_async(project_id: int, concurrency: Optional[int] = Query(None, ge=1, le=256), batch_size: Optional[int] = Query(None, ge=1, le=50), db: Session = Depends(get_db)):
     proj = db.query(Project).filter(Project.id == project_id).first()
     if not proj:
         raise HTTPException(status_code=404, detail="Project not found")
-    req = Request(type=RequestTypeEnum.generate_answers, status=RequestStatusEnum.PENDING, entity_id=str(project_id))
-    db.add(req)
-    db.commit()
-    db.refresh(req)
-    background_tasks.add_task(_generate_all_task, req.id, project_id)
+    if concurrency and concurrency > MAX_THREAD_CONCURRENCY and not settings.ASYNC_GENERATION:
+        raise HTTPException(status_code=400, detail=f"concurrency above {MAX_THREAD_CONCURRENCY} requires ASYNC_GENERATION")
+    req = enqueue_request(db, RequestTypeEnum.generate_answers, {"project_id": project_id, "concurrency": concurrency, "batch_size": batch_size}, entity_id=str(project_id))
     return RequestResponse(id=req.id, type=RequestType(req.type.value), status=RequestStatus(req.status.value), entity_id=req.entity_id, result_payload=req.result_payload, error_message=req.error_message, created_at=req.created_at)
 
+@router.get("/cache-stats")
+def get_answer_cache_stats():
+    return answer_cache_stats()
+
 @router.post("/update", response_model=AnswerResponse)
 def update_answer(answer_id: int, body: AnswerUpdate, db: Session = Depends(get_db)):
     answer = db.query(Answer).filter(Answer.id == answer_id).first()
@@ -98,5 +96,43 @@ def get_answer_by_question(question_id: int, db: Session = Depends(get_db)):
 
 @router.get("/by-project/{project_id}", response_model=list)
 def list_answers_by_project(project_id: int, db: Session = Depends(get_db)):
-    q_ids = [r[0] for r in db.query(Question.id).filter(Question.project_id == project_id).all()]
-    return [_answer_to_response(a) for a in db.query(Answer).filter(Answer.question_id.in_(q_ids)).all()]
+    # Two queries regardless of size: answers joined to their questions, then all citations via selectinload.
+    answers = db.query(Answer).join(Question, Answer.question_id == Question.id).filter(Question.project_id == project_id).options(selectinload(Answer.citations)).order_by(Question.order_index, Answer.id).all()
+    return [_answer_to_response(a) for a in answers]
+
+def _export_records(project_id: int) -> Iterator[dict]:
+    # Own session: the response body is produced after the request handler returns.
+    # yield_per streams questions from a server-side cursor; citations load once per batch.
+    db = SessionLocal()
+    try:
+        stmt = select(Question, Answer).outerjoin(Answer, Answer.question_id == Question.id).where(Question.project_id == project_id).options(selectinload(Answer.citations)).order_by(Question.order_index, Question.id, Answer.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+        for q, a in db.execute(stmt):
+            rec = {"question_id": q.id, "order_index": q.order_index, "section_id": q.section_id, "section_title": q.section_title, "question_text": q.question_text, "answer": None}
+            if a is not None:
+                rec["answer"] = {"id": a.id, "status": a.status.value, "answer_text": _effective_answer_text(a), "is_answerable": bool(a.is_answerable), "confidence_score": a.confidence_score, "ai_answer_text": a.ai_answer_text, "manual_answer_text": a.manual_answer_text, "human_answer_text": a.human_answer_text, "updated_at": a.updated_at.isoformat() if a.updated_at else None, "citations": [{"chunk_id": c.chunk_id, "document_id": c.document_id, "snippet": c.snippet, "bounding_box_ref": c.bounding_box_ref, "order_index": c.order_index} for c in a.citations]}
+            yield rec
+    finally:
+        db.close()
+
+def _export_ndjson(project_id: int) -> Iterator[str]:
+    for rec in _export_records(project_id):
+        yield json.dumps(rec, ensure_ascii=False) + "\n"
+
+def _export_csv(project_id: int) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_CSV_COLUMNS)
+    for rec in _export_records(project_id):
+        a = rec["answer"] or {}
+        writer.writerow([rec["question_id"], rec["order_index"], rec["section_id"], rec["section_title"], rec["question_text"], a.get("id"), a.get("status"), a.get("answer_text"), a.get("is_answerable"), a.get("confidence_score"), a.get("ai_answer_text"), a.get("manual_answer_text"), a.get("human_answer_text"), json.dumps(a.get("citations") or [], ensure_ascii=False)])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+@router.get("/export/{project_id}")
+def export_project_answers(project_id: int, format: Literal["ndjson", "csv"] = Query("ndjson"), db: Session = Depends(get_db)):
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+    if format == "csv":
+        return StreamingResponse(_export_csv(project_id), media_type="text/csv", headers={"Content-Disposition": f'attachment; filename="project_{project_id}_answers.csv"'})
+    return StreamingResponse(_export_ndjson(project_id), media_type="application/x-ndjson", headers={"Content-Disposition": f'attachment; filename="project_{project_id}_answers.ndjson"'})
@@ -1,73 +1,55 @@
 import os
-from pathlib import Path
-from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 from sqlalchemy.orm import Session
 from src.core.config import settings
-from src.models.db_models import Request, RequestTypeEnum, RequestStatusEnum, DocumentRegistry
+from src.models.db_models import RequestTypeEnum, DocumentRegistry
 from src.models.schemas import DocumentRegistryResponse, RequestResponse, RequestType, RequestStatus
-from src.services.ingestion_service import run_indexing_and_registry
-from src.storage.database import get_db, SessionLocal
+from src.storage.chunk_writer import ingest_stats
+from src.storage.database import get_db
+from src.utils.uploads import UploadTooLargeError, save_upload_stream
+from src.workers.queue import enqueue_request
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
-def _save_upload(file_content: bytes, filename: str) -> str:
-    name = Path(filename).name.replace("/", "").replace("\\", "").replace("..", "")[:255]
-    if not name.strip():
-        raise ValueError("Invalid filename")
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    path = os.path.join(settings.UPLOAD_DIR, name)
-    with open(path, "wb") as f:
-        f.write(file_content)
-    return path
-
-def _index_task(request_id: int, file_path: str, filename: str):
-    db = SessionLocal()
-    try:
-        req = db.query(Request).filter(Request.id == request_id).first()
-        if not req or req.status != RequestStatusEnum.PENDING:
-            return
-        req.status = RequestStatusEnum.RUNNING
-        db.commit()
-        doc_id, sec, cit = run_indexing_and_registry(db, file_path, filename, None)
-        req = db.query(Request).filter(Request.id == request_id).first()
-        if req:
-            req.status = RequestStatusEnum.COMPLETED
-            req.entity_id = doc_id
-            req.result_payload = f'{{"document_id":"{doc_id}","section_count":{sec},"citation_count":{cit}}}'
-            req.error_message = None
-            db.commit()
-    except Exception as e:
-        db.rollback()
-        req = db.query(Request).filter(Request.id == request_id).first()
-        if req:
-            req.status = RequestStatusEnum.FAILED
-            req.error_message = str(e)
-            db.commit()
-    finally:
-        try:
-            if os.path.isfile(file_path):
-                os.remove(file_path)
-        except Exception:
-            pass
-        db.close()
-
 @router.post("/index-async", response_model=RequestResponse)
-async def index_document_async(background_tasks: BackgroundTasks, file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def index_document_async(file: UploadFile = File(...), document_id: Optional[str] = Form(None), db: Session = Depends(get_db)):
     if not file.filename:
         raise HTTPException(status_code=400, detail="Missing filename")
-    content = await file.read()
     try:
-        path = _save_upload(content, file.filename)
+        path = await save_upload_stream(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    req = Request(type=RequestTypeEnum.index_document, status=RequestStatusEnum.PENDING, entity_id=None)
-    db.add(req)
-    db.commit()
-    db.refresh(req)
-    background_tasks.add_task(_index_task, req.id, path, file.filename)
+    req = enqueue_request(db, RequestTypeEnum.index_document, {"file_path": path, "filename": file.filename, "document_id": document_id.strip() if document_id else None})
     return RequestResponse(id=req.id, type=RequestType(req.type.value), status=RequestStatus(req.status.value), entity_id=req.entity_id, result_payload=req.result_payload, error_message=req.error_message, created_at=req.created_at)
 
+@router.post("/bulk-index-async", response_model=RequestResponse)
+async def bulk_index_documents_async(files: List[UploadFile] = File(...), db: Session = Depends(get_db)):
+    # Many files and/or .zip/.tar archives, indexed by one pipelined request with per-file status in its progress.
+    if len(files) > settings.BULK_INGEST_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BULK_INGEST_MAX_FILES} files per request")
+    saved = []
+    try:
+        for file in files:
+            if not file.filename:
+                raise HTTPException(status_code=400, detail="Missing filename")
+            saved.append({"file_path": await save_upload_stream(file), "filename": file.filename})
+    except (HTTPException, ValueError) as e:
+        for entry in saved:
+            os.remove(entry["file_path"])
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=413 if isinstance(e, UploadTooLargeError) else 400, detail=str(e))
+    req = enqueue_request(db, RequestTypeEnum.index_documents, {"files": saved})
+    return RequestResponse(id=req.id, type=RequestType(req.type.value), status=RequestStatus(req.status.value), entity_id=req.entity_id, result_payload=req.result_payload, error_message=req.error_message, created_at=req.created_at)
+
+@router.get("/ingest-stats")
+def get_ingest_stats():
+    return ingest_stats()
+
 @router.get("", response_model=list)
 def list_documents(db: Session = Depends(get_db)):
     rows = db.query(DocumentRegistry).order_by(DocumentRegistry.indexed_at.desc()).all()
-    return [DocumentRegistryResponse(id=r.id, document_id=r.document_id, filename=r.filename, indexed_at=r.indexed_at, chunk_count_section=r.chunk_count_section, chunk_count_citation=r.chunk_count_citation, created_at=r.created_at) for r in rows]
+    return [DocumentRegistryResponse(id=r.id, document_id=r.document_id, filename=r.filename, content_hash=r.content_hash, indexed_at=r.indexed_at, chunk_count_section=r.chunk_count_section, chunk_count_citation=r.chunk_count_citation, created_at=r.created_at) for r in rows]
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from src.utils.metrics import CONTENT_TYPE, render
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics")
+def get_metrics():
+    # Prometheus text format; sync, so the scrape-time DB queries run in the threadpool.
+    return Response(render(), media_type=CONTENT_TYPE)
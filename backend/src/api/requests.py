@@ -1,14 +1,57 @@
+import asyncio
+from typing import AsyncIterator
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
 from src.models.db_models import Request
 from src.models.schemas import RequestResponse, RequestType, RequestStatus
-from src.storage.database import get_db
+from src.storage.database import get_async_db, get_db
+from src.utils.sse import SSE_HEADERS, SSE_KEEPALIVE, sse_event
+from src.workers.events import get_request_event_listener
 
 router = APIRouter(prefix="/requests", tags=["requests"])
 
+TERMINAL_STATUSES = (RequestStatus.COMPLETED, RequestStatus.FAILED)
+
+def _request_to_response(req: Request) -> RequestResponse:
+    return RequestResponse(id=req.id, type=RequestType(req.type.value), status=RequestStatus(req.status.value), entity_id=req.entity_id, result_payload=req.result_payload, error_message=req.error_message, progress=req.progress, created_at=req.created_at)
+
 @router.get("/{request_id}", response_model=RequestResponse)
 def get_request_status(request_id: int, db: Session = Depends(get_db)):
     req = db.query(Request).filter(Request.id == request_id).first()
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
-    return RequestResponse(id=req.id, type=RequestType(req.type.value), status=RequestStatus(req.status.value), entity_id=req.entity_id, result_payload=req.result_payload, error_message=req.error_message, created_at=req.created_at)
+    return _request_to_response(req)
+
+async def _request_events(request_id: int) -> AsyncIterator[str]:
+    # "status" carries the full request row (first, on status changes and at the end); "progress" relays worker updates.
+    async with get_request_event_listener().subscribe(request_id) as queue, AsyncSessionLocal() as db:
+        async def snapshot() -> RequestResponse:
+            resp = _request_to_response(await db.get(Request, request_id, populate_existing=True))
+            await db.rollback()  # no idle transaction while waiting for events
+            return resp
+
+        req = await snapshot()
+        yield sse_event("status", req.model_dump_json())
+        while req.status not in TERMINAL_STATUSES:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.REQUEST_EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                event = None
+            if event and event["event"] == "progress":
+                yield sse_event("progress", event["data"])
+                continue
+            last_status, req = req.status, await snapshot()
+            if req.status != last_status:
+                yield sse_event("status", req.model_dump_json())
+            elif event is None:
+                yield SSE_KEEPALIVE
+
+@router.get("/{request_id}/events")
+async def stream_request_events(request_id: int, db: AsyncSession = Depends(get_async_db)):
+    if await db.get(Request, request_id) is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return StreamingResponse(_request_events(request_id), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -1,4 +1,4 @@
 from src.core.config import settings
-from src.core.database import Base, get_db, SessionLocal, engine
+from src.core.database import AsyncSessionLocal, Base, get_async_db, get_async_engine, get_db, init_db, SessionLocal, engine
 
-__all__ = ["settings", "Base", "get_db", "SessionLocal", "engine"]
+__all__ = ["settings", "AsyncSessionLocal", "Base", "get_async_db", "get_async_engine", "get_db", "init_db", "SessionLocal", "engine"]
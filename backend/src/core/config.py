@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Dict
 from pydantic_settings import BaseSettings
 
 
@@ -7,8 +8,68 @@ class Settings(BaseSettings):
     VECTOR_STORE_TABLE_NAME: str = "document_chunks"
     VECTOR_SIZE: int = 1536
     OPENAI_API_KEY: str = ""
+    EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    EMBEDDING_BATCH_SIZE: int = 256  # texts per embedding request; each embedded batch is COPYed in as one insert
+    EMBEDDING_CONCURRENCY: int = 4  # embedding requests in flight per process
+    EMBEDDING_MAX_RETRIES: int = 5  # on rate limits, timeouts and 5xx, with exponential backoff (or Retry-After)
+    EMBEDDING_RETRY_BASE_SECONDS: float = 1.0
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500_000
+    EMBEDDING_CACHE_EVICT_INTERVAL_SECONDS: float = 300.0  # how often a process checks the cache size after storing
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024
+    MAX_BULK_UPLOAD_SIZE: int = 2 * 1024 * 1024 * 1024  # whole request body of a bulk upload
     UPLOAD_DIR: str = "/tmp/questionnaire_uploads"
+    LOADER_WORKERS: int = 0  # 0 = one per CPU, 1 = load inline without a process pool
+    LOADER_MIN_PAGES_PER_SHARD: int = 8
+    BULK_INGEST_MAX_FILES: int = 1000  # per bulk request, after expanding archives
+    BULK_INGEST_MAX_EXTRACTED_SIZE: int = 2 * 1024 * 1024 * 1024  # per archive
+    BULK_INGEST_LOAD_WORKERS: int = 2
+    BULK_INGEST_EMBED_WORKERS: int = 4  # concurrent embedding calls
+    BULK_INGEST_STORE_WORKERS: int = 2
+    BULK_INGEST_QUEUE_SIZE: int = 4  # files buffered between stages; bounds memory held by loaded/embedded files
+    LLM_MODEL: str = "gpt-4o-mini"
+    ANSWER_CACHE_ENABLED: bool = True
+    GENERATION_CONCURRENCY: int = 4
+    ASYNC_GENERATION: bool = False  # project generation on an event loop (async DB, vector store, ainvoke) instead of threads
+    GENERATION_BATCH_SIZE: int = 1  # > 1: up to this many questions of one section (or with mostly shared chunks) per LLM call
+    GENERATION_BATCH_MIN_OVERLAP: float = 0.5  # share of a question's chunks already in a group for it to join across sections
+    GENERATION_BATCH_TOKEN_BUDGET: int = 4000  # context budget of a batched call
+    DB_POOL_SIZE: int = 10  # sync engine; DB_POOL_SIZE + DB_MAX_OVERFLOW also caps threaded generation
+    DB_MAX_OVERFLOW: int = 30
+    ASYNC_DB_POOL_SIZE: int = 20
+    ASYNC_DB_MAX_OVERFLOW: int = 20
+    ANSWER_REUSE_ENABLED: bool = True
+    ANSWER_REUSE_MIN_SIMILARITY: float = 0.95  # cosine similarity for nearest-neighbour question matches
+    STARTUP_WARMUP: bool = True  # warm DB pools, the vector store, tokenizer and loader processes before serving
+    EMBEDDED_WORKER: bool = True  # run a job worker inside the API process; disable when running worker.py separately
+    WORKER_CONCURRENCY: Dict[str, int] = {"index_document": 2, "index_documents": 1, "create_project": 1, "update_project": 4, "generate_answers": 1}
+    WORKER_POLL_SECONDS: float = 1.0
+    WORKER_HEARTBEAT_SECONDS: float = 10.0
+    WORKER_STALE_SECONDS: float = 60.0
+    WORKER_MAX_ATTEMPTS: int = 3
+    WORKER_METRICS_PORT: int = 0  # > 0: standalone workers serve Prometheus metrics on this port
+    REQUEST_EVENTS_KEEPALIVE_SECONDS: float = 15.0  # SSE keepalive; the request row is re-read at the same interval
+    VECTOR_INDEX_TYPE: str = "hnsw"  # "hnsw", "ivfflat" or "none"; (re)built on startup when missing or changed
+    VECTOR_INDEX_HNSW_M: int = 16
+    VECTOR_INDEX_HNSW_EF_CONSTRUCTION: int = 64
+    VECTOR_INDEX_IVFFLAT_LISTS: int = 0  # 0 = rows/1000 (sqrt(rows) above 1M rows)
+    VECTOR_INDEX_IVFFLAT_MIN_ROWS: int = 10_000  # IVFFlat lists are trained on existing rows; build once there is data
+    VECTOR_INDEX_EF_SEARCH: int = 100
+    VECTOR_INDEX_PROBES: int = 10
+    VECTOR_INDEX_ITERATIVE_SCAN: str = ""  # pgvector >= 0.8: "relaxed_order" keeps filtered ANN queries returning k rows
+    RETRIEVAL_SMALL_TO_BIG: bool = False
+    RETRIEVAL_K: int = 6
+    CONTEXT_PACKING: bool = True  # dedup overlapping chunks, order by MMR and fit the prompt context to a token budget
+    CONTEXT_TOKEN_BUDGET: int = 2000
+    CONTEXT_MMR_LAMBDA: float = 0.7  # 1.0 = retrieval rank only, lower = prefer chunks that add new text
+    CONTEXT_MAX_OVERLAP: float = 0.8  # share of a chunk's word 3-grams found in a longer chunk above which it is dropped
+    RETRIEVAL_HYBRID: bool = False  # fuse full-text (tsvector/GIN) and vector results by reciprocal rank fusion
+    HYBRID_VECTOR_K: int = 20
+    HYBRID_KEYWORD_K: int = 20
+    HYBRID_VECTOR_WEIGHT: float = 1.0
+    HYBRID_KEYWORD_WEIGHT: float = 1.0
+    HYBRID_RRF_K: int = 60
+    HYBRID_TSV_LANG: str = "english"
 
     class Config:
         env_file = Path(__file__).resolve().parent.parent.parent / ".env"
@@ -1,19 +1,96 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import time
+import weakref
+from collections import defaultdict
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import Pool
 from src.core.config import settings
+from src.utils.aio import loop_local
+from src.utils.metrics import DB_CHECKOUTS, DB_CONNECTION_HELD, STAGE_SECONDS, Gauge
 
 _db_url = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql+psycopg://")
 if _db_url.startswith("postgresql://") and "+" not in _db_url:
     _db_url = _db_url.replace("postgresql://", "postgresql+psycopg://", 1)
 
-engine = create_engine(_db_url, pool_pre_ping=True, pool_size=5, max_overflow=10)
+_pools: "weakref.WeakKeyDictionary[Pool, str]" = weakref.WeakKeyDictionary()
+
+def _instrument_pool(pool: Pool, kind: str):
+    # Checkout counts and hold times; size, in-use and overflow are read from the pools at scrape time.
+    _pools[pool] = kind
+
+    def checkout(dbapi_connection, record, proxy):
+        DB_CHECKOUTS.inc(pool=kind)
+        record.info["checked_out_at"] = time.perf_counter()
+
+    def checkin(dbapi_connection, record):
+        started = record.info.pop("checked_out_at", None)
+        if started is not None:
+            DB_CONNECTION_HELD.observe(time.perf_counter() - started, pool=kind)
+
+    event.listen(pool, "checkout", checkout)
+    event.listen(pool, "checkin", checkin)
+
+def _pool_gauge(name: str, help: str, read):
+    def collect():
+        totals = defaultdict(int)
+        for pool, kind in list(_pools.items()):
+            totals[kind] += read(pool)
+        return [((kind,), value) for kind, value in totals.items()]
+    Gauge(name, help, collect, ("pool",))
+
+_pool_gauge("dd_db_pool_size", "Configured pool size, summed over the pools of a kind (async: one per event loop).", lambda p: p.size())
+_pool_gauge("dd_db_pool_checked_out", "Connections currently checked out.", lambda p: p.checkedout())
+_pool_gauge("dd_db_pool_overflow", "Connections open beyond the pool size.", lambda p: max(0, p.overflow()))
+
+@event.listens_for(Session, "before_commit")
+def _commit_started(session: Session):
+    session.info["commit_started"] = time.perf_counter()
+
+@event.listens_for(Session, "after_commit")
+def _commit_finished(session: Session):
+    # Flush plus COMMIT, for sync sessions and the sync sessions behind AsyncSession alike.
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="db_commit")
+
+engine = create_engine(_db_url, pool_pre_ping=True, pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW)
+_instrument_pool(engine.pool, "sync")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def _create_async_engine() -> AsyncEngine:
+    async_engine = create_async_engine(_db_url, pool_pre_ping=True, pool_size=settings.ASYNC_DB_POOL_SIZE, max_overflow=settings.ASYNC_DB_MAX_OVERFLOW)
+    _instrument_pool(async_engine.sync_engine.pool, "async")
+    return async_engine
+
+def get_async_engine() -> AsyncEngine:
+    return loop_local("async_engine", _create_async_engine)
+
+def AsyncSessionLocal() -> AsyncSession:
+    # expire_on_commit=False: expired attributes would need an implicit (sync) lazy load after commit.
+    return AsyncSession(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def init_db():
+    from src.models.db_models import SCHEMA_UPGRADES
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for stmt in SCHEMA_UPGRADES:
+            conn.execute(text(stmt))
@@ -0,0 +1,95 @@
+"""Startup warm-up and import-time report: python -m src.core.warmup [module]"""
+import asyncio
+import logging
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Tuple, Union
+from sqlalchemy import text
+from src.core.config import settings
+from src.core.database import engine, get_async_engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| *(\S+)$")
+
+def _db_pool():
+    # Hold pool_size connections at once so each is a distinct, already-authenticated pooled connection.
+    conns = [engine.connect() for _ in range(engine.pool.size())]
+    for conn in conns:
+        conn.execute(text("SELECT 1"))
+        conn.close()
+
+async def _async_db_pool():
+    # Runs on the loop that serves requests: async pools are per event loop.
+    conns = [await get_async_engine().connect() for _ in range(settings.ASYNC_DB_POOL_SIZE)]
+    for conn in conns:
+        await conn.close()
+
+def _vector_store():
+    from src.storage.vector_store import get_vector_store_service
+    get_vector_store_service().get_by_ids(["warmup"])  # PGEngine setup, table DDL check and a pooled connection
+
+def _tokenizer():
+    # OpenAIEmbeddings splits inputs with tiktoken and context packing counts tokens with the chat model's encoding;
+    # loading an encoding reads (or downloads) its BPE file.
+    import tiktoken
+    from src.utils.tokens import count_tokens
+    count_tokens("")
+    tiktoken.encoding_for_model(settings.EMBEDDING_MODEL)
+
+def _loaders():
+    from src.utils.loaders import warm_loader_pool
+    warm_loader_pool()
+
+async def warm_up(async_db: bool = True, loaders: bool = True) -> Dict[str, float]:
+    # Best effort: steps run concurrently and a failing step is logged, never fatal. Returns ms per step.
+    # loaders=False where no jobs run (an API without embedded worker never loads documents).
+    steps: Dict[str, Callable[[], Union[None, Awaitable[None]]]] = {"db_pool": _db_pool, "vector_store": _vector_store, "tokenizer": _tokenizer}
+    if loaders:
+        steps["loaders"] = _loaders
+    if async_db:
+        steps["async_db_pool"] = _async_db_pool
+    timings: Dict[str, float] = {}
+
+    async def run(name: str, step):
+        t = time.perf_counter()
+        try:
+            await (step() if asyncio.iscoroutinefunction(step) else asyncio.to_thread(step))
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+        timings[name] = round((time.perf_counter() - t) * 1000, 1)
+
+    t = time.perf_counter()
+    await asyncio.gather(*(run(name, step) for name, step in steps.items()))
+    logger.info("Warm-up finished in %.0f ms: %s", (time.perf_counter() - t) * 1000, timings)
+    return timings
+
+def import_time_report(module: str = "app", top: int = 15) -> Tuple[float, List[Tuple[str, int, float]]]:
+    # Imports `module` in a fresh interpreter with -X importtime. Returns the total ms and, per top-level package,
+    # (package, modules imported, ms spent in its own module bodies), slowest first.
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=BACKEND_DIR, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"import {module} failed")
+    packages: Dict[str, List[float]] = {}
+    total = 0.0
+    for m in filter(None, map(_IMPORTTIME_LINE.match, proc.stderr.splitlines())):
+        name = m.group(3)
+        if name == module:
+            total = int(m.group(2)) / 1000
+        acc = packages.setdefault(name.split(".")[0], [0, 0.0])
+        acc[0] += 1
+        acc[1] += int(m.group(1)) / 1000
+    ranked = sorted(((name, int(n), round(ms, 1)) for name, (n, ms) in packages.items()), key=lambda r: -r[2])
+    return round(total, 1), ranked[:top]
+
+if __name__ == "__main__":
+    module = sys.argv[1] if len(sys.argv) > 1 else "app"
+    total, rows = import_time_report(module)
+    print(f"import {module}: {total:.0f} ms")
+    print(f"{'package':<32}{'modules':>8}{'ms':>10}")
+    for name, count, ms in rows:
+        print(f"{name:<32}{count:>8}{ms:>10.1f}")
@@ -1,23 +1,74 @@
+import hashlib
 import uuid
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+from langchain_core.documents import Document
 from src.storage.vector_store import get_vector_store_service
 from src.utils.loaders import get_file_type, load_documents_from_file_sync
-from src.utils.text_splitter import split_into_section_chunks, split_into_citation_chunks
+from src.utils.metrics import STAGE_SECONDS
+from src.utils.text_splitter import split_into_hierarchical_chunks
 
-def index_document(file_path: str, filename: str, document_id: Optional[str] = None) -> Tuple[str, int, int]:
-    doc_id = document_id or str(uuid.uuid4())
-    file_type = get_file_type(filename)
-    raw_docs = load_documents_from_file_sync(file_path, file_type)
+def file_content_hash(file_path: str) -> str:
+    h = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def chunk_ids(doc_id: str, chunks: List[Document], kind: str) -> List[str]:
+    # Content-addressed ids: unchanged chunks keep their id across versions of a document.
+    ids, seen = [], {}
+    for c in chunks:
+        digest = hashlib.sha256(f"{c.metadata.get('page', '')}\x00{c.metadata.get('parent_id', '')}\x00{c.page_content}".encode("utf-8")).hexdigest()[:16]
+        n = seen[digest] = seen.get(digest, -1) + 1
+        ids.append(f"{doc_id}_{kind}_{digest}" + (f"_{n}" if n else ""))
+    return ids
+
+def load_document(file_path: str, filename: str, doc_id: str, raw_docs: Optional[List[Document]] = None) -> List[Document]:
+    # raw_docs: pages the caller already loaded from file_path, tagged here instead of loading the file again.
+    if raw_docs is None:
+        with STAGE_SECONDS.time(stage="load"):
+            raw_docs = load_documents_from_file_sync(file_path, get_file_type(filename))
     if not raw_docs:
         raise ValueError(f"No content from {filename}")
     for d in raw_docs:
         d.metadata["document_id"] = doc_id
         d.metadata["filename"] = filename
-    section_chunks = split_into_section_chunks(raw_docs)
-    citation_chunks = split_into_citation_chunks(raw_docs)
-    section_ids = [f"{doc_id}_sec_{i}" for i in range(len(section_chunks))]
-    citation_ids = [f"{doc_id}_cit_{i}" for i in range(len(citation_chunks))]
+    return raw_docs
+
+def build_chunks(raw_docs: List[Document], doc_id: str) -> Tuple[Dict[str, Document], int, int]:
+    # Sections and their citation chunks keyed by chunk id, plus (section count, citation count).
+    with STAGE_SECONDS.time(stage="split"):
+        hierarchy = split_into_hierarchical_chunks(raw_docs)
+    section_ids = chunk_ids(doc_id, [sec for sec, _ in hierarchy], "sec")
+    chunks: Dict[str, Document] = {}
+    citation_count = 0
+    for sec_id, (section, children) in zip(section_ids, hierarchy):
+        chunks[sec_id] = section
+        for child in children:
+            child.metadata["parent_id"] = sec_id
+        chunks.update(zip(chunk_ids(doc_id, children, "cit"), children))
+        citation_count += len(children)
+    return chunks, len(section_ids), citation_count
+
+def diff_chunks(chunks: Dict[str, Document], doc_id: str, known: bool) -> Tuple[List[str], List[str]]:
+    # (ids to insert, stored ids to delete); only a known document_id can have stored chunks.
+    existing = set(get_vector_store_service().get_document_chunk_ids(doc_id)) if known else set()
+    return [i for i in chunks if i not in existing], [i for i in existing if i not in chunks]
+
+def store_chunks(chunks: Dict[str, Document], new_ids: List[str], stale_ids: List[str], vectors: Optional[List[List[float]]] = None):
     vs = get_vector_store_service()
-    vs.add_documents(section_chunks, ids=section_ids)
-    vs.add_documents(citation_chunks, ids=citation_ids)
-    return doc_id, len(section_chunks), len(citation_chunks)
+    if new_ids:
+        docs = [chunks[i] for i in new_ids]
+        if vectors is None:
+            vs.add_documents(docs, ids=new_ids)
+        else:
+            vs.add_embeddings([d.page_content for d in docs], vectors, [d.metadata for d in docs], ids=new_ids)
+    vs.delete(stale_ids)
+
+def index_document(file_path: str, filename: str, document_id: Optional[str] = None, raw_docs: Optional[List[Document]] = None) -> Tuple[str, int, int, bool]:
+    # Re-indexing a known document_id only inserts new chunks and deletes stale ones; `changed` is False if nothing moved.
+    doc_id = document_id or str(uuid.uuid4())
+    chunks, section_count, citation_count = build_chunks(load_document(file_path, filename, doc_id, raw_docs), doc_id)
+    new_ids, stale_ids = diff_chunks(chunks, doc_id, bool(document_id))
+    store_chunks(chunks, new_ids, stale_ids)
+    return doc_id, section_count, citation_count, bool(new_ids or stale_ids)
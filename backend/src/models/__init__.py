@@ -1,5 +1,5 @@
 from src.models.db_models import (
     Base, Project, Question, Answer, Citation, Request,
-    EvaluationRun, EvaluationResult, DocumentRegistry,
+    EvaluationRun, EvaluationResult, DocumentRegistry, EmbeddingCache, AnswerCache,
     ProjectStatusEnum, AnswerStatusEnum, RequestTypeEnum, RequestStatusEnum,
 )
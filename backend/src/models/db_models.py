@@ -1,6 +1,8 @@
 import enum
+from pgvector.sqlalchemy import Vector
 from sqlalchemy import Column, DateTime, Enum, Float, ForeignKey, Integer, String, Text, func
 from sqlalchemy.orm import relationship
+from src.core.config import settings
 from src.core.database import Base
 
 
@@ -25,6 +27,7 @@ class RequestTypeEnum(str, enum.Enum):
     create_project = "create_project"
     update_project = "update_project"
     index_document = "index_document"
+    index_documents = "index_documents"
     generate_answers = "generate_answers"
 
 
@@ -40,12 +43,35 @@ class DocumentRegistry(Base):
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(String(255), unique=True, nullable=False, index=True)
     filename = Column(String(512), nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)
     indexed_at = Column(DateTime(timezone=True), server_default=func.now())
     chunk_count_section = Column(Integer, default=0)
     chunk_count_citation = Column(Integer, default=0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class EmbeddingCache(Base):
+    __tablename__ = "embedding_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, nullable=False, index=True)
+    model = Column(String(128), nullable=False)
+    embedding = Column(Vector(), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class AnswerCache(Base):
+    __tablename__ = "answer_cache"
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)
+    model = Column(String(128), nullable=False)
+    question_text = Column(Text, nullable=False)
+    chunk_ids = Column(Text, nullable=False)
+    response = Column(Text, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Project(Base):
     __tablename__ = "projects"
     id = Column(Integer, primary_key=True, index=True)
@@ -67,6 +93,7 @@ class Question(Base):
     section_title = Column(String(512), nullable=True)
     question_text = Column(Text, nullable=False)
     order_index = Column(Integer, nullable=False, default=0)
+    embedding = Column(Vector(settings.VECTOR_SIZE), nullable=True)
     project = relationship("Project", back_populates="questions")
     answer = relationship("Answer", back_populates="question", uselist=False, cascade="all, delete-orphan")
     evaluation_results = relationship("EvaluationResult", back_populates="question", cascade="all, delete-orphan")
@@ -83,6 +110,8 @@ class Answer(Base):
     ai_answer_text = Column(Text, nullable=True)
     manual_answer_text = Column(Text, nullable=True)
     human_answer_text = Column(Text, nullable=True)
+    corpus_fingerprint = Column(String(64), nullable=True, index=True)
+    reused_from_answer_id = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     question = relationship("Question", back_populates="answer")
@@ -109,6 +138,12 @@ class Request(Base):
     entity_id = Column(String(255), nullable=True, index=True)
     result_payload = Column(Text, nullable=True)
     error_message = Column(Text, nullable=True)
+    payload = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    worker_id = Column(String(255), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    progress = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -132,3 +167,22 @@ class EvaluationResult(Base):
     details = Column(Text, nullable=True)
     run = relationship("EvaluationRun", back_populates="results")
     question = relationship("Question", back_populates="evaluation_results")
+
+
+# Columns added after the initial schema; create_all() does not alter existing tables.
+SCHEMA_UPGRADES = [
+    f"ALTER TABLE questions ADD COLUMN IF NOT EXISTS embedding vector({settings.VECTOR_SIZE})",
+    "ALTER TABLE document_registry ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "CREATE INDEX IF NOT EXISTS ix_document_registry_content_hash ON document_registry (content_hash)",
+    "ALTER TABLE requests ADD COLUMN IF NOT EXISTS payload TEXT",
+    "ALTER TABLE requests ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE requests ADD COLUMN IF NOT EXISTS worker_id VARCHAR(255)",
+    "ALTER TABLE requests ADD COLUMN IF NOT EXISTS started_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE requests ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE",
+    "ALTER TABLE requests ADD COLUMN IF NOT EXISTS progress TEXT",
+    "ALTER TYPE requesttypeenum ADD VALUE IF NOT EXISTS 'index_documents'",
+    "ALTER TABLE answers ADD COLUMN IF NOT EXISTS corpus_fingerprint VARCHAR(64)",
+    "ALTER TABLE answers ADD COLUMN IF NOT EXISTS reused_from_answer_id INTEGER",
+    "CREATE INDEX IF NOT EXISTS ix_answers_corpus_fingerprint ON answers (corpus_fingerprint)",
+    "CREATE INDEX IF NOT EXISTS ix_questions_embedding_hnsw ON questions USING hnsw (embedding vector_cosine_ops)",
+]
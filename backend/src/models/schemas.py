@@ -25,6 +25,7 @@ class RequestType(str, Enum):
     create_project = "create_project"
     update_project = "update_project"
     index_document = "index_document"
+    index_documents = "index_documents"
     generate_answers = "generate_answers"
 
 
@@ -54,6 +55,7 @@ class RequestResponse(BaseModel):
     entity_id: Optional[str] = None
     result_payload: Optional[str] = None
     error_message: Optional[str] = None
+    progress: Optional[str] = None
     created_at: datetime
     class Config:
         from_attributes = True
@@ -63,6 +65,7 @@ class DocumentRegistryResponse(BaseModel):
     id: int
     document_id: str
     filename: str
+    content_hash: Optional[str] = None
     indexed_at: datetime
     chunk_count_section: int
     chunk_count_citation: int
@@ -87,6 +90,7 @@ class AnswerResponse(BaseModel):
     ai_answer_text: Optional[str] = None
     manual_answer_text: Optional[str] = None
     human_answer_text: Optional[str] = None
+    reused_from_answer_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     citations: List[CitationResponse] = []
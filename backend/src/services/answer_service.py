@@ -1,13 +1,47 @@
+import asyncio
+import hashlib
 import json
+import logging
 import re
-from typing import List, Tuple
-from langchain_openai import ChatOpenAI
-from sqlalchemy.orm import Session
-from src.models.db_models import Answer, Citation, Question, AnswerStatusEnum
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import zip_longest
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from src.core.config import settings
+from src.models.db_models import Answer, Citation, Project, Question, AnswerStatusEnum
+from src.services.context_packer import pack_context
+from src.services.ingestion_service import corpus_fingerprint
+from src.services.project_service import aembed_questions, embed_questions, scope_document_ids
+from src.services.reuse_service import prefill_reused_answers
+from src.storage.bulk_writes import bulk_insert
+from src.storage.answer_cache import aget_cached_answer, answer_cache_key, astore_cached_answer, get_cached_answer, prompt_hash, store_cached_answer
 from src.storage.vector_store import get_vector_store_service
+from src.utils.aio import loop_local
+from src.utils.metrics import LLM_TOKENS, STAGE_SECONDS
+from src.utils.tokens import count_tokens
 
 SYSTEM_PROMPT = """Answer the question using ONLY the provided context. If the context does not contain enough information, set "answerable" to false.
 Output a JSON object with keys: "answer" (string), "answerable" (boolean), "confidence" (float 0-1), "citations" (array of {"chunk_id": "...", "snippet": "..."})."""
+USER_PROMPT = "Context:\n{context}\n\nQuestion: {question}\n\nOutput JSON only."
+PROMPT_HASH = prompt_hash(SYSTEM_PROMPT, USER_PROMPT)
+BATCH_SYSTEM_PROMPT = """Answer each question using ONLY the provided context. If the context does not contain enough information for a question, set its "answerable" to false.
+Output a JSON object {"answers": [...]} with one entry per question and keys: "id" (the question id, e.g. "Q1"), "answer" (string), "answerable" (boolean), "confidence" (float 0-1), "citations" (array of {"chunk_id": "...", "snippet": "..."})."""
+BATCH_USER_PROMPT = "Context:\n{context}\n\nQuestions:\n{questions}\n\nOutput JSON only."
+BATCH_PROMPT_HASH = prompt_hash(BATCH_SYSTEM_PROMPT, BATCH_USER_PROMPT)
+NO_DOCUMENTS_ANSWER = "No relevant documents found."
+# Every generation thread checks out a sync engine connection (cache lookups, retrieval), so threads never outnumber the
+# pool; with the default 10 + 30 connections, 32 threads leave 8 for the worker loop and API requests.
+MAX_THREAD_CONCURRENCY = min(32, settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+_JSON_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+logger = logging.getLogger(__name__)
+ProgressCallback = Callable[[dict], None]
+Job = Tuple[int, str, object, Optional[str]]  # question id, text, embedding, section id
+Result = Tuple[int, Optional[dict], list]  # question id, answer data (None = failed), context docs
 
 def _build_context(docs):
     return "\n\n---\n\n".join(f"[chunk_{i}]\n{d.page_content}" for i, d in enumerate(docs))
@@ -20,34 +54,477 @@ def _parse_llm_json(text):
     m = re.search(r"\{.*\}", text, re.DOTALL)
     return json.loads(m.group(0)) if m else {"answer": text, "answerable": True, "confidence": 0.5, "citations": []}
 
-def generate_answer_for_question(db: Session, question_id: int) -> Tuple[Answer, List[Citation]]:
-    q = db.query(Question).filter(Question.id == question_id).first()
-    if not q:
-        raise ValueError("Question not found")
-    vs = get_vector_store_service()
-    retriever = vs.get_retriever(search_kwargs={"k": 6})
-    docs = retriever.invoke(q.question_text)
+class _AnswerFieldStream:
+    """Incrementally decodes the "answer" string out of the streamed JSON reply, so clients receive answer text rather than JSON tokens."""
+    _start = re.compile(r'"answer"\s*:\s*"')
+
+    def __init__(self):
+        self._buf, self._pos, self._done = "", None, False
+
+    def feed(self, chunk: str) -> str:
+        self._buf += chunk
+        if self._done:
+            return ""
+        if self._pos is None:
+            m = self._start.search(self._buf)
+            if not m:
+                return ""
+            self._pos = m.end()
+        buf, i, out = self._buf, self._pos, []
+        while i < len(buf):
+            c = buf[i]
+            if c == '"':
+                self._done = True
+                break
+            if c != "\\":
+                out.append(c)
+                i += 1
+                continue
+            if i + 1 >= len(buf) or (buf[i + 1] == "u" and i + 6 > len(buf)):
+                break  # escape split across chunks
+            if buf[i + 1] == "u":
+                code, low = int(buf[i + 2:i + 6], 16), buf[i + 6:i + 12]
+                if 0xD800 <= code < 0xDC00:  # high surrogate: JSON writes non-BMP characters as a pair of escapes
+                    if len(low) < 6 and "\\u".startswith(low[:2]):
+                        break  # pair split across chunks
+                    if low[:2] == "\\u" and 0xDC00 <= int(low[2:], 16) < 0xE000:
+                        out.append(chr(0x10000 + ((code - 0xD800) << 10) + int(low[2:], 16) - 0xDC00))
+                        i += 12
+                        continue
+                out.append(chr(code))
+                i += 6
+            else:
+                out.append(_JSON_ESCAPES.get(buf[i + 1], buf[i + 1]))
+                i += 2
+        self._pos = i
+        return "".join(out)
+
+def _parent_ids(citation_docs: list) -> List[str]:
+    return list(dict.fromkeys(d.metadata.get("parent_id") or d.id for d in citation_docs))
+
+def _sections_in_rank_order(parent_ids: List[str], parents: list, citation_docs: list) -> list:
+    # Small-to-big: swap matched citation chunks for their parent sections, keeping rank order.
+    by_id = {d.id: d for d in parents}
+    by_id.update({d.id: d for d in citation_docs if d.id not in by_id and not d.metadata.get("parent_id")})
+    return [by_id[i] for i in parent_ids if i in by_id]
+
+def _expand_to_sections(vs, citation_docs: list) -> list:
+    parent_ids = _parent_ids(citation_docs)
+    return _sections_in_rank_order(parent_ids, vs.get_by_ids(parent_ids), citation_docs)
+
+async def _aexpand_to_sections(vs, citation_docs: list) -> list:
+    parent_ids = _parent_ids(citation_docs)
+    return _sections_in_rank_order(parent_ids, await vs.aget_by_ids(parent_ids), citation_docs)
+
+def _retrieval_filter(document_ids: Optional[List[str]]) -> Optional[dict]:
+    # The project scope is a document_id filter inside the vector (and keyword) SQL, not a post-filter.
+    f = {"document_id": {"$in": document_ids}} if document_ids else {}
+    if settings.RETRIEVAL_SMALL_TO_BIG:
+        f["chunk_type"] = "citation"
+    return f or None
+
+def _search(vs, question_text: str, embedding, k: int, filter: Optional[dict] = None) -> list:
+    if settings.RETRIEVAL_HYBRID:
+        return vs.hybrid_search_by_vector(question_text, embedding, k=k, filter=filter)
+    return vs.similarity_search_by_vector(embedding, k=k, filter=filter)
+
+async def _asearch(vs, question_text: str, embedding, k: int, filter: Optional[dict] = None) -> list:
+    if settings.RETRIEVAL_HYBRID:
+        return await vs.ahybrid_search_by_vector(question_text, embedding, k=k, filter=filter)
+    return await vs.asimilarity_search_by_vector(embedding, k=k, filter=filter)
+
+def _retrieve(question_text: str, embedding=None, k: Optional[int] = None, document_ids: Optional[List[str]] = None) -> list:
+    with STAGE_SECONDS.time(stage="retrieval"):
+        vs = get_vector_store_service()
+        embedding = [float(x) for x in embedding] if embedding is not None else vs.get_embeddings().embed_query(question_text)
+        docs = _search(vs, question_text, embedding, k or settings.RETRIEVAL_K, _retrieval_filter(document_ids))
+        docs = _expand_to_sections(vs, docs) if settings.RETRIEVAL_SMALL_TO_BIG else docs
+        return pack_context(docs) if settings.CONTEXT_PACKING else docs
+
+async def _aretrieve(question_text: str, embedding=None, k: Optional[int] = None, document_ids: Optional[List[str]] = None) -> list:
+    with STAGE_SECONDS.time(stage="retrieval"):
+        vs = get_vector_store_service()
+        embedding = [float(x) for x in embedding] if embedding is not None else await vs.get_embeddings().aembed_query(question_text)
+        docs = await _asearch(vs, question_text, embedding, k or settings.RETRIEVAL_K, _retrieval_filter(document_ids))
+        docs = await _aexpand_to_sections(vs, docs) if settings.RETRIEVAL_SMALL_TO_BIG else docs
+        return pack_context(docs) if settings.CONTEXT_PACKING else docs
+
+def _get_llm():
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model=settings.LLM_MODEL, temperature=0)
+
+def _get_async_llm():
+    import openai
+    from langchain_openai import ChatOpenAI
+    # Loop-local HTTP pool: langchain_openai's shared default async client must not be used from two event loops.
+    return ChatOpenAI(model=settings.LLM_MODEL, temperature=0, http_async_client=loop_local("openai_http", openai.DefaultAsyncHttpxClient))
+
+def _record_llm_call(messages: List[dict], content: str, seconds: float, usage: Optional[dict] = None):
+    # Provider-reported usage (langchain usage_metadata) when present, otherwise counted with the local tokenizer.
+    STAGE_SECONDS.observe(seconds, stage="llm")
+    usage = usage or {"input_tokens": sum(count_tokens(m["content"]) for m in messages), "output_tokens": count_tokens(content)}
+    LLM_TOKENS.inc(usage.get("input_tokens", 0), kind="prompt")
+    LLM_TOKENS.inc(usage.get("output_tokens", 0), kind="completion")
+
+def _invoke(llm, messages: List[dict]) -> str:
+    started = time.perf_counter()
+    reply = llm.invoke(messages)
+    _record_llm_call(messages, reply.content, time.perf_counter() - started, getattr(reply, "usage_metadata", None))
+    return reply.content
+
+async def _ainvoke(llm, messages: List[dict]) -> str:
+    started = time.perf_counter()
+    reply = await llm.ainvoke(messages)
+    _record_llm_call(messages, reply.content, time.perf_counter() - started, getattr(reply, "usage_metadata", None))
+    return reply.content
+
+def _chunk_ids(docs) -> List[str]:
+    return [d.id or hashlib.sha256(d.page_content.encode("utf-8")).hexdigest()[:16] for d in docs]
+
+def _cache_key(question_text: str, docs: list, digest: str = PROMPT_HASH) -> Optional[str]:
+    return answer_cache_key(question_text, _chunk_ids(docs), settings.LLM_MODEL, digest) if settings.ANSWER_CACHE_ENABLED else None
+
+def _messages(question_text: str, docs: list) -> List[dict]:
+    return [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": USER_PROMPT.format(context=_build_context(docs), question=question_text)}]
+
+def _parse_content(content: str) -> dict:
+    try:
+        return _parse_llm_json(content)
+    except json.JSONDecodeError:
+        return {"answer": content, "answerable": True, "confidence": 0.5, "citations": []}
+
+def _no_documents() -> Tuple[dict, list]:
+    return {"answer": NO_DOCUMENTS_ANSWER, "answerable": False, "confidence": 0.0, "citations": []}, []
+
+def _answer_from_docs(question_text: str, llm, docs: list) -> Tuple[dict, list]:
+    # LLM (+ answer cache) only, no request session: safe to run in worker threads.
     if not docs:
-        answer = Answer(question_id=q.id, answer_text="No relevant documents found.", is_answerable=0, confidence_score=0.0, status=AnswerStatusEnum.PENDING, ai_answer_text="No relevant documents found.")
-        db.add(answer)
-        db.flush()
-        return answer, []
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    content = llm.invoke([{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": f"Context:\n{_build_context(docs)}\n\nQuestion: {q.question_text}\n\nOutput JSON only."}]).content
+        return _no_documents()
+    cache_key = _cache_key(question_text, docs)
+    cached = get_cached_answer(cache_key) if cache_key else None
+    if cached is not None:
+        return cached, docs
+    data = _parse_content(_invoke(llm, _messages(question_text, docs)))
+    if cache_key:
+        store_cached_answer(cache_key, question_text, _chunk_ids(docs), settings.LLM_MODEL, data)
+    return data, docs
+
+async def _aanswer_from_docs(question_text: str, llm, docs: list) -> Tuple[dict, list]:
+    if not docs:
+        return _no_documents()
+    cache_key = _cache_key(question_text, docs)
+    cached = await aget_cached_answer(cache_key) if cache_key else None
+    if cached is not None:
+        return cached, docs
+    data = _parse_content(await _ainvoke(llm, _messages(question_text, docs)))
+    if cache_key:
+        await astore_cached_answer(cache_key, question_text, _chunk_ids(docs), settings.LLM_MODEL, data)
+    return data, docs
+
+def _answer_question_text(question_text: str, llm, embedding=None, document_ids: Optional[List[str]] = None) -> Tuple[dict, list]:
+    return _answer_from_docs(question_text, llm, _retrieve(question_text, embedding, document_ids=document_ids))
+
+async def _aanswer_question_text(question_text: str, llm, embedding=None, document_ids: Optional[List[str]] = None) -> Tuple[dict, list]:
+    return await _aanswer_from_docs(question_text, llm, await _aretrieve(question_text, embedding, document_ids=document_ids))
+
+async def _astream_answer_question_text(question_text: str, llm, embedding=None, document_ids: Optional[List[str]] = None) -> AsyncIterator[Tuple[str, object]]:
+    # Yields ("token", text) while the answer streams, then ("result", (data, docs)).
+    docs = await _aretrieve(question_text, embedding, document_ids=document_ids)
+    if not docs:
+        data, docs = _no_documents()
+        yield "token", data["answer"]
+        yield "result", (data, docs)
+        return
+    cache_key = _cache_key(question_text, docs)
+    cached = await aget_cached_answer(cache_key) if cache_key else None
+    if cached is not None:
+        yield "token", cached.get("answer", "")
+        yield "result", (cached, docs)
+        return
+    messages, parts, answer_field, usage = _messages(question_text, docs), [], _AnswerFieldStream(), None
+    started = time.perf_counter()
+    async for chunk in llm.astream(messages):
+        parts.append(chunk.content)
+        usage = getattr(chunk, "usage_metadata", None) or usage
+        delta = answer_field.feed(chunk.content)
+        if delta:
+            yield "token", delta
+    content = "".join(parts)
+    _record_llm_call(messages, content, time.perf_counter() - started, usage)
+    data = _parse_content(content)
+    if cache_key:
+        await astore_cached_answer(cache_key, question_text, _chunk_ids(docs), settings.LLM_MODEL, data)
+    yield "result", (data, docs)
+
+def _try_retrieve(job: Job, document_ids: Optional[List[str]]) -> Optional[list]:
+    # Batched generation retrieves for every question up front; a failure leaves the question to the single path.
+    try:
+        return _retrieve(job[1], job[2], document_ids=document_ids)
+    except Exception:
+        logger.exception("Retrieval failed for question %s", job[0])
+        return None
+
+async def _atry_retrieve(job: Job, document_ids: Optional[List[str]]) -> Optional[list]:
+    try:
+        return await _aretrieve(job[1], job[2], document_ids=document_ids)
+    except Exception:
+        logger.exception("Retrieval failed for question %s", job[0])
+        return None
+
+def _group_jobs(jobs: List[Job], retrieved: Dict[int, Optional[list]], size: int) -> List[List[Job]]:
+    # Consecutive questions share one call while the group has room and they are in the same section, or at least
+    # GENERATION_BATCH_MIN_OVERLAP of their retrieved chunks are already in the group. Without chunks: alone.
+    groups, group_ids = [], set()
+    for job in jobs:
+        docs = retrieved.get(job[0])
+        ids = set(_chunk_ids(docs or []))
+        last = groups[-1] if groups else None
+        if docs and last and retrieved.get(last[0][0]) and len(last) < size and ((job[3] is not None and job[3] == last[-1][3]) or len(ids & group_ids) >= settings.GENERATION_BATCH_MIN_OVERLAP * len(ids)):
+            last.append(job)
+            group_ids |= ids
+        else:
+            groups.append([job])
+            group_ids = ids
+    return groups
+
+def _group_docs(doc_lists: List[list]) -> list:
+    # Union of the questions' chunks, interleaved by rank so every question's best chunks are packed first.
+    seen, docs = set(), []
+    for d in (d for rank in zip_longest(*doc_lists) for d in rank if d is not None):
+        chunk_id = _chunk_ids([d])[0]
+        if chunk_id not in seen:
+            seen.add(chunk_id)
+            docs.append(d)
+    return pack_context(docs, token_budget=settings.GENERATION_BATCH_TOKEN_BUDGET) if settings.CONTEXT_PACKING else docs
+
+def _batch_messages(question_texts: List[str], docs: list) -> List[dict]:
+    questions = "\n".join(f"[Q{i + 1}] {text}" for i, text in enumerate(question_texts))
+    return [{"role": "system", "content": BATCH_SYSTEM_PROMPT}, {"role": "user", "content": BATCH_USER_PROMPT.format(context=_build_context(docs), questions=questions)}]
+
+def _parse_batch(content: str, n: int) -> Dict[int, dict]:
+    # Reply -> {position in the batch: answer data}. Missing, malformed or unknown entries are left out.
     try:
         data = _parse_llm_json(content)
     except json.JSONDecodeError:
-        data = {"answer": content, "answerable": True, "confidence": 0.5, "citations": []}
-    answer = Answer(question_id=q.id, answer_text=data.get("answer", ""), is_answerable=1 if data.get("answerable", True) else 0, confidence_score=float(data.get("confidence", 0.5)), status=AnswerStatusEnum.PENDING, ai_answer_text=data.get("answer", ""))
-    db.add(answer)
-    db.flush()
-    citations_list = []
-    for i, c in enumerate(data.get("citations") or []):
-        if isinstance(c, dict):
-            doc_id = next((d.metadata.get("document_id") for d in docs if d.metadata.get("document_id")), None)
-            citations_list.append(Citation(answer_id=answer.id, chunk_id=str(c.get("chunk_id", c.get("id", ""))), document_id=doc_id, snippet=(c.get("snippet", "") or "")[:2000], order_index=i))
-    for cit in citations_list:
-        db.add(cit)
+        return {}
+    answers = {}
+    for entry in (data.get("answers") or []) if isinstance(data, dict) else []:
+        m = re.fullmatch(r"\s*Q?(\d+)\s*", str(entry.get("id", ""))) if isinstance(entry, dict) else None
+        if m and 1 <= int(m.group(1)) <= n and isinstance(entry.get("answer"), str):
+            answers.setdefault(int(m.group(1)) - 1, {k: entry[k] for k in ("answer", "answerable", "confidence", "citations") if k in entry})
+    return answers
+
+def _batch_answers(question_texts: List[str], docs: list, llm) -> Dict[int, dict]:
+    # Cached per question under the batch prompt and the group's chunks; one call for the rest.
+    keys = [_cache_key(text, docs, BATCH_PROMPT_HASH) for text in question_texts]
+    answers = {i: cached for i, key in enumerate(keys) if key and (cached := get_cached_answer(key)) is not None}
+    todo = [i for i in range(len(question_texts)) if i not in answers]
+    if todo:
+        reply = _parse_batch(_invoke(llm, _batch_messages([question_texts[i] for i in todo], docs)), len(todo))
+        for pos, data in reply.items():
+            answers[todo[pos]] = data
+            if keys[todo[pos]]:
+                store_cached_answer(keys[todo[pos]], question_texts[todo[pos]], _chunk_ids(docs), settings.LLM_MODEL, data)
+    return answers
+
+async def _abatch_answers(question_texts: List[str], docs: list, llm) -> Dict[int, dict]:
+    keys = [_cache_key(text, docs, BATCH_PROMPT_HASH) for text in question_texts]
+    answers = {i: cached for i, key in enumerate(keys) if key and (cached := await aget_cached_answer(key)) is not None}
+    todo = [i for i in range(len(question_texts)) if i not in answers]
+    if todo:
+        reply = _parse_batch(await _ainvoke(llm, _batch_messages([question_texts[i] for i in todo], docs)), len(todo))
+        for pos, data in reply.items():
+            answers[todo[pos]] = data
+            if keys[todo[pos]]:
+                await astore_cached_answer(keys[todo[pos]], question_texts[todo[pos]], _chunk_ids(docs), settings.LLM_MODEL, data)
+    return answers
+
+def _answer_single(job: Job, docs: Optional[list], llm, document_ids: Optional[List[str]]) -> Result:
+    try:
+        return (job[0], *(_answer_from_docs(job[1], llm, docs) if docs is not None else _answer_question_text(job[1], llm, job[2], document_ids)))
+    except Exception:
+        logger.exception("Answer generation failed for question %s", job[0])
+        return job[0], None, []
+
+async def _aanswer_single(job: Job, docs: Optional[list], llm, document_ids: Optional[List[str]]) -> Result:
+    try:
+        return (job[0], *(await _aanswer_from_docs(job[1], llm, docs) if docs is not None else await _aanswer_question_text(job[1], llm, job[2], document_ids)))
+    except Exception:
+        logger.exception("Answer generation failed for question %s", job[0])
+        return job[0], None, []
+
+def _unanswered(group: List[Job], answers: Dict[int, dict]):
+    if len(answers) < len(group):
+        logger.warning("Batched call answered %d of %d questions; asking %s one by one", len(answers), len(group), [j[0] for i, j in enumerate(group) if i not in answers])
+
+def _answer_group(group: List[Job], retrieved: Dict[int, Optional[list]], llm, document_ids: Optional[List[str]]) -> List[Result]:
+    # One call over the group's shared context; questions the reply leaves out (or a failed call) fall back to single calls.
+    answers, docs = {}, []
+    if len(group) > 1:
+        try:
+            docs = _group_docs([retrieved[j[0]] for j in group])
+            answers = _batch_answers([j[1] for j in group], docs, llm)
+        except Exception:
+            logger.exception("Batched answer generation failed for questions %s", [j[0] for j in group])
+        _unanswered(group, answers)
+    return [(j[0], answers[i], docs) if i in answers else _answer_single(j, retrieved.get(j[0]), llm, document_ids) for i, j in enumerate(group)]
+
+async def _aanswer_group(group: List[Job], retrieved: Dict[int, Optional[list]], llm, document_ids: Optional[List[str]]) -> List[Result]:
+    answers, docs = {}, []
+    if len(group) > 1:
+        try:
+            docs = _group_docs([retrieved[j[0]] for j in group])
+            answers = await _abatch_answers([j[1] for j in group], docs, llm)
+        except Exception:
+            logger.exception("Batched answer generation failed for questions %s", [j[0] for j in group])
+        _unanswered(group, answers)
+    return [(j[0], answers[i], docs) if i in answers else await _aanswer_single(j, retrieved.get(j[0]), llm, document_ids) for i, j in enumerate(group)]
+
+def _answer_row(question_id: int, data: dict, fingerprint: Optional[str]) -> dict:
+    return {"question_id": question_id, "answer_text": data.get("answer", ""), "is_answerable": 1 if data.get("answerable", True) else 0, "confidence_score": float(data.get("confidence", 0.5)), "status": AnswerStatusEnum.PENDING, "ai_answer_text": data.get("answer", ""), "corpus_fingerprint": fingerprint}
+
+def _citation_rows(answer_id: int, data: dict, docs: list) -> List[dict]:
+    doc_id = next((d.metadata.get("document_id") for d in docs if d.metadata.get("document_id")), None)
+    return [{"answer_id": answer_id, "chunk_id": str(c.get("chunk_id", c.get("id", ""))), "document_id": doc_id, "snippet": (c.get("snippet", "") or "")[:2000], "order_index": i} for i, c in enumerate(data.get("citations") or []) if isinstance(c, dict)]
+
+def _save_answers(db: Session, results: List[Tuple[int, dict, list]], fingerprint: Optional[str] = None) -> List[Tuple[Answer, List[Citation]]]:
+    # (question id, data, docs) -> saved answers with their citations: two INSERT ... RETURNING and one commit for the batch.
+    if not results:
+        return []
+    answers = bulk_insert(db, Answer, [_answer_row(qid, data, fingerprint) for qid, data, _ in results])
+    citations = defaultdict(list)
+    for c in bulk_insert(db, Citation, [row for a, (_, data, docs) in zip(answers, results) for row in _citation_rows(a.id, data, docs)]):
+        citations[c.answer_id].append(c)
+    saved = [(a, citations[a.id]) for a in answers]  # grouped before commit expires the attributes
     db.commit()
-    db.refresh(answer)
-    return answer, citations_list
+    return saved
+
+def _save_answer(db: Session, question_id: int, data: dict, docs: list, fingerprint: Optional[str] = None) -> Tuple[Answer, List[Citation]]:
+    return _save_answers(db, [(question_id, data, docs)], fingerprint)[0]
+
+async def agenerate_answer_for_question(adb: AsyncSession, question_id: int) -> Tuple[Answer, List[Citation]]:
+    q = (await adb.execute(select(Question).where(Question.id == question_id).options(selectinload(Question.project)))).scalar_one_or_none()
+    if not q:
+        raise ValueError("Question not found")
+    if await aembed_questions([q]):
+        await adb.commit()
+    fingerprint = await adb.run_sync(corpus_fingerprint)
+    data, docs = await _aanswer_question_text(q.question_text, _get_async_llm(), q.embedding, scope_document_ids(q.project.scope))
+    return await adb.run_sync(_save_answer, q.id, data, docs, fingerprint)
+
+async def astream_answer_for_question(adb: AsyncSession, question_id: int) -> AsyncIterator[Tuple[str, object]]:
+    # Streaming variant of agenerate_answer_for_question: ("token", text)* then ("answer", (answer, citations)).
+    q = (await adb.execute(select(Question).where(Question.id == question_id).options(selectinload(Question.project)))).scalar_one_or_none()
+    if not q:
+        raise ValueError("Question not found")
+    if await aembed_questions([q]):
+        await adb.commit()
+    fingerprint = await adb.run_sync(corpus_fingerprint)
+    async for kind, value in _astream_answer_question_text(q.question_text, _get_async_llm(), q.embedding, scope_document_ids(q.project.scope)):
+        if kind == "token":
+            yield kind, value
+        else:
+            yield "answer", await adb.run_sync(_save_answer, q.id, *value, fingerprint)
+
+def delete_project_answers(db: Session, project_id: int) -> int:
+    deleted = db.query(Answer).filter(Answer.question_id.in_(select(Question.id).where(Question.project_id == project_id))).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def _check_failures(progress: dict, attempted: int):
+    # Single questions may fail (logged and counted); failing every one means the run itself is broken.
+    if attempted and progress["failed"] == attempted:
+        raise RuntimeError(f"Answer generation failed for all {attempted} question(s)")
+
+def generate_answers_for_project(db: Session, project_id: int, concurrency: Optional[int] = None, on_progress: Optional[ProgressCallback] = None, batch_size: Optional[int] = None) -> dict:
+    # Workers only do retrieval/LLM I/O; this thread saves whatever has completed since its last save in one batch.
+    # With a batch size > 1, all questions are retrieved first so groups can be formed from their chunks.
+    fingerprint = corpus_fingerprint(db)
+    project = db.query(Project).filter(Project.id == project_id).first()
+    document_ids = scope_document_ids(project.scope) if project else None
+    questions = db.query(Question).filter(Question.project_id == project_id).order_by(Question.order_index).all()
+    embed_questions(questions)
+    jobs = [(q.id, q.question_text, q.embedding, q.section_id) for q in questions]
+    delete_project_answers(db, project_id)  # also commits any backfilled question embeddings
+    if settings.ANSWER_REUSE_ENABLED:
+        reused = prefill_reused_answers(db, project_id, fingerprint)
+        db.commit()
+        jobs = [j for j in jobs if j[0] not in reused]
+    progress = {"total": len(questions), "done": len(questions) - len(jobs), "failed": 0}
+    if on_progress:
+        on_progress(dict(progress))
+    if not jobs:
+        return progress
+    batch_size = max(1, batch_size or settings.GENERATION_BATCH_SIZE)
+    workers = max(1, min(concurrency or settings.GENERATION_CONCURRENCY, MAX_THREAD_CONCURRENCY, len(jobs)))
+    llm = _get_llm()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="answer-gen") as pool:
+        try:
+            retrieved = dict(zip([j[0] for j in jobs], pool.map(lambda j: _try_retrieve(j, document_ids), jobs))) if batch_size > 1 else {}
+            pending = {pool.submit(_answer_group, group, retrieved, llm, document_ids) for group in _group_jobs(jobs, retrieved, batch_size)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                results = [r for fut in done for r in fut.result()]
+                saved = [r for r in results if r[1] is not None]
+                progress["failed"] += len(results) - len(saved)
+                _save_answers(db, saved, fingerprint)
+                progress["done"] += len(saved)
+                if on_progress:
+                    on_progress({**progress, "question_id": results[-1][0]})
+        except BaseException:
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
+    _check_failures(progress, len(jobs))
+    return progress
+
+async def agenerate_answers_for_project(adb: AsyncSession, project_id: int, concurrency: Optional[int] = None, on_progress: Optional[ProgressCallback] = None, batch_size: Optional[int] = None) -> dict:
+    # Same flow as generate_answers_for_project, but questions are coroutines on one loop instead of threads;
+    # the ORM steps reuse the sync helpers through run_sync on this one session.
+    fingerprint = await adb.run_sync(corpus_fingerprint)
+    project = await adb.get(Project, project_id)
+    document_ids = scope_document_ids(project.scope) if project else None
+    questions = (await adb.execute(select(Question).where(Question.project_id == project_id).order_by(Question.order_index))).scalars().all()
+    await aembed_questions(questions)
+    jobs = [(q.id, q.question_text, q.embedding, q.section_id) for q in questions]
+    await adb.run_sync(delete_project_answers, project_id)
+    if settings.ANSWER_REUSE_ENABLED:
+        reused = await adb.run_sync(prefill_reused_answers, project_id, fingerprint)
+        await adb.commit()
+        jobs = [j for j in jobs if j[0] not in reused]
+    progress = {"total": len(questions), "done": len(questions) - len(jobs), "failed": 0}
+    if on_progress:
+        await asyncio.to_thread(on_progress, dict(progress))
+    if not jobs:
+        return progress
+    batch_size = max(1, batch_size or settings.GENERATION_BATCH_SIZE)
+    limit = asyncio.Semaphore(max(1, concurrency or settings.GENERATION_CONCURRENCY))
+    llm = _get_async_llm()
+
+    async def retrieve(job: Job) -> Tuple[int, Optional[list]]:
+        async with limit:
+            return job[0], await _atry_retrieve(job, document_ids)
+
+    async def answer(group: List[Job]) -> List[Result]:
+        async with limit:
+            return await _aanswer_group(group, retrieved, llm, document_ids)
+
+    retrieved = dict(await asyncio.gather(*(retrieve(j) for j in jobs))) if batch_size > 1 else {}
+    tasks = [asyncio.ensure_future(answer(group)) for group in _group_jobs(jobs, retrieved, batch_size)]
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            results = [r for t in done for r in t.result()]
+            saved = [r for r in results if r[1] is not None]
+            progress["failed"] += len(results) - len(saved)
+            await adb.run_sync(_save_answers, saved, fingerprint)
+            progress["done"] += len(saved)
+            if on_progress:
+                await asyncio.to_thread(on_progress, {**progress, "question_id": results[-1][0]})
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    _check_failures(progress, len(jobs))
+    return progress
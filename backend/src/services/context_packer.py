@@ -0,0 +1,56 @@
+import re
+from typing import FrozenSet, List, Optional
+from langchain_core.documents import Document
+from src.core.config import settings
+from src.utils.tokens import count_tokens, truncate_tokens
+
+_WORD = re.compile(r"\w+")
+_CHUNK_OVERHEAD_TOKENS = 8  # "[chunk_i]" label and separator per chunk in the prompt
+
+def _shingles(text: str, n: int = 3) -> FrozenSet[tuple]:
+    words = _WORD.findall(text.lower())
+    return frozenset(zip(*(words[i:] for i in range(n)))) if len(words) >= n else frozenset([tuple(words)])
+
+def _overlap(a: FrozenSet[tuple], b: FrozenSet[tuple]) -> float:
+    # Overlap coefficient: 1.0 when one chunk's text is contained in the other's.
+    return len(a & b) / min(len(a), len(b)) if a and b else 0.0
+
+def pack_context(docs: List[Document], token_budget: Optional[int] = None, mmr_lambda: Optional[float] = None, max_overlap: Optional[float] = None) -> List[Document]:
+    # Retrieved chunks in rank order -> the chunks to send: (1) a chunk mostly contained in a longer candidate
+    # (a citation chunk cut from a retrieved section) is dropped and the longer one takes its rank; (2) the rest is
+    # ordered by MMR, trading rank against word overlap with chunks already chosen; (3) chunks are added in that
+    # order while they fit the token budget. The first chunk is always sent, truncated if it alone exceeds it.
+    budget = settings.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    lam = settings.CONTEXT_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+    threshold = settings.CONTEXT_MAX_OVERLAP if max_overlap is None else max_overlap
+    if not docs:
+        return []
+    shingles = [_shingles(d.page_content) for d in docs]
+    rank = list(range(len(docs)))
+    alive = set(rank)
+    for i in range(len(docs)):
+        for j in range(i + 1, len(docs)):
+            if i in alive and j in alive and _overlap(shingles[i], shingles[j]) >= threshold:
+                small, big = (i, j) if len(docs[i].page_content) <= len(docs[j].page_content) else (j, i)
+                alive.discard(small)
+                rank[big] = min(rank[big], rank[small])
+    candidates, order = sorted(alive, key=lambda i: rank[i]), []
+    while candidates:
+        def mmr(i: int) -> float:
+            redundancy = max((_overlap(shingles[i], shingles[j]) for j in order), default=0.0)
+            return lam * (1 - rank[i] / len(docs)) - (1 - lam) * redundancy
+        best = max(candidates, key=mmr)
+        order.append(best)
+        candidates.remove(best)
+    packed, used = [], 0
+    for i in order:
+        tokens = count_tokens(docs[i].page_content) + _CHUNK_OVERHEAD_TOKENS
+        if used + tokens <= budget:
+            packed.append(docs[i])
+            used += tokens
+        elif not packed:
+            # The id changes with the cut, so the answer cache never confuses it with the full chunk.
+            cut = max(1, budget - _CHUNK_OVERHEAD_TOKENS)
+            packed.append(Document(page_content=truncate_tokens(docs[i].page_content, cut), metadata=docs[i].metadata, id=f"{docs[i].id}#t{cut}" if docs[i].id else None))
+            used = budget
+    return packed
@@ -1,7 +1,11 @@
 import re
-from langchain_openai import OpenAIEmbeddings
+import time
+import numpy as np
 from sqlalchemy.orm import Session
 from src.models.db_models import EvaluationRun, EvaluationResult, Answer, Question
+from src.storage.bulk_writes import bulk_insert, bulk_insert_ids
+from src.storage.vector_store import get_vector_store_service
+from src.utils.metrics import STAGE_SECONDS
 
 def _keyword_overlap(ai: str, human: str) -> float:
     def tokens(t): return set(re.sub(r"[^\w\s]", " ", (t or "").lower()).split())
@@ -10,31 +14,38 @@ def _keyword_overlap(ai: str, human: str) -> float:
     if not a_set or not b_set: return 0.0
     return len(a_set & b_set) / max(len(a_set), len(b_set))
 
+def _semantic_scores(ai_texts, human_texts) -> np.ndarray:
+    # Embed each distinct text once (large batches), then score all pairs as one row-wise cosine.
+    texts = list(dict.fromkeys(ai_texts + human_texts))
+    vecs = np.asarray(get_vector_store_service().embed_documents(texts), dtype=np.float32)
+    pos = {t: i for i, t in enumerate(texts)}
+    a, b = vecs[[pos[t] for t in ai_texts]], vecs[[pos[t] for t in human_texts]]
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    cos = np.divide(np.einsum("ij,ij->i", a, b), norms, out=np.full(len(a), -1.0, dtype=np.float32), where=norms > 0)
+    return np.clip((cos + 1) / 2, 0, 1)
+
 def run_evaluation(db: Session, project_id: int, use_embeddings: bool = True) -> EvaluationRun:
-    run = EvaluationRun(project_id=project_id)
-    db.add(run)
-    db.flush()
-    questions = db.query(Question).filter(Question.project_id == project_id).order_by(Question.order_index).all()
-    embeddings = OpenAIEmbeddings() if use_embeddings else None
-    for q in questions:
-        ans = db.query(Answer).filter(Answer.question_id == q.id).first()
-        if not ans or not ans.human_answer_text:
-            continue
-        ai_text, human_text = ans.ai_answer_text or "", ans.human_answer_text or ""
-        kw = _keyword_overlap(ai_text, human_text)
-        if use_embeddings and embeddings:
-            vecs = embeddings.embed_documents([ai_text, human_text])
-            if len(vecs) == 2:
-                a, b = vecs[0], vecs[1]
-                dot = sum(x * y for x, y in zip(a, b))
-                na, nb = sum(x * x for x in a) ** 0.5, sum(y * y for y in b) ** 0.5
-                sem = max(0, min(1, (dot / (na * nb) + 1) / 2)) if na and nb else 0
-                score, details = 0.5 * sem + 0.5 * kw, f"semantic={sem:.3f}, keyword={kw:.3f}"
-            else:
-                score, details = kw, f"keyword={kw:.3f}"
+    started = time.perf_counter()
+    run = bulk_insert(db, EvaluationRun, [{"project_id": project_id}])[0]
+    rows = db.query(Question.id, Answer.ai_answer_text, Answer.human_answer_text).join(Answer, Answer.question_id == Question.id).filter(Question.project_id == project_id).order_by(Question.order_index, Answer.id).all()
+    pairs = {}
+    for qid, ai_text, human_text in rows:
+        pairs.setdefault(qid, (ai_text or "", human_text))
+    pairs = {qid: p for qid, p in pairs.items() if p[1]}
+    ai_texts, human_texts = [p[0] for p in pairs.values()], [p[1] for p in pairs.values()]
+    kws = [_keyword_overlap(a, h) for a, h in zip(ai_texts, human_texts)]
+    sems = _semantic_scores(ai_texts, human_texts) if use_embeddings and pairs else None
+    results = []
+    for i, (qid, (ai_text, human_text)) in enumerate(pairs.items()):
+        kw = kws[i]
+        if sems is not None:
+            sem = float(sems[i])
+            score, details = 0.5 * sem + 0.5 * kw, f"semantic={sem:.3f}, keyword={kw:.3f}"
         else:
             score, details = kw, f"keyword={kw:.3f}"
-        db.add(EvaluationResult(run_id=run.id, question_id=q.id, ai_answer=ai_text, human_answer=human_text, similarity_score=round(score, 4), details=details))
+        results.append({"run_id": run.id, "question_id": qid, "ai_answer": ai_text, "human_answer": human_text, "similarity_score": round(score, 4), "details": details})
+    bulk_insert_ids(db, EvaluationResult, results)
     db.commit()
     db.refresh(run)
+    STAGE_SECONDS.observe(time.perf_counter() - started, stage="evaluation")
     return run
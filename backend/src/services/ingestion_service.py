@@ -1,16 +1,190 @@
-from typing import Optional, Tuple
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from langchain_core.documents import Document
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from src.indexing.pipeline import index_document
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.indexing.pipeline import build_chunks, diff_chunks, file_content_hash, index_document, load_document, store_chunks
 from src.models.db_models import DocumentRegistry, Project, ProjectStatusEnum
+from src.storage.vector_store import get_vector_store_service
+from src.utils.scope import scope_document_ids
+from src.utils.stages import Stage, run_stages
 
-def run_indexing_and_registry(db: Session, file_path: str, filename: str, document_id: Optional[str] = None) -> Tuple[str, int, int]:
-    doc_id, sec_count, cit_count = index_document(file_path, filename, document_id)
-    reg = db.query(DocumentRegistry).filter(DocumentRegistry.document_id == doc_id).first()
+logger = logging.getLogger(__name__)
+
+def mark_all_docs_projects_outdated(db: Session, *document_ids: str) -> None:
+    # ALL_DOCS projects always; scoped projects only when a changed document is in their parsed scope (a substring
+    # match on the stored scope would also hit ids that contain another id).
+    changed = set(document_ids)
+    projects = db.query(Project.id, Project.scope).filter(Project.status != ProjectStatusEnum.OUTDATED).all()
+    outdated = [pid for pid, scope in projects if (ids := scope_document_ids(scope)) is None or changed.intersection(ids)]
+    if outdated:
+        db.query(Project).filter(Project.id.in_(outdated)).update({Project.status: ProjectStatusEnum.OUTDATED}, synchronize_session=False)
+    db.commit()
+
+def corpus_fingerprint(db: Session) -> str:
+    # Identifies the indexed evidence corpus. Questionnaire uploads are left out so creating a project does not change it.
+    questionnaires = select(Project.questionnaire_document_id).where(Project.questionnaire_document_id.isnot(None))
+    rows = db.query(DocumentRegistry.document_id, DocumentRegistry.content_hash, DocumentRegistry.indexed_at).filter(DocumentRegistry.document_id.notin_(questionnaires)).order_by(DocumentRegistry.document_id).all()
+    return hashlib.sha256("\n".join(f"{d}:{h or t}" for d, h, t in rows).encode("utf-8")).hexdigest()
+
+def _unchanged_registry(db: Session, content_hash: str, document_id: Optional[str]) -> Optional[DocumentRegistry]:
+    unchanged = db.query(DocumentRegistry).filter(DocumentRegistry.content_hash == content_hash)
+    if document_id:
+        unchanged = unchanged.filter(DocumentRegistry.document_id == document_id)
+    return unchanged.order_by(DocumentRegistry.indexed_at.desc()).first()
+
+def _previous_version(db: Session, document_id: Optional[str]) -> Optional[DocumentRegistry]:
+    # Only an explicit document_id makes an upload a new version of a known document; filenames are not identities.
+    return db.query(DocumentRegistry).filter(DocumentRegistry.document_id == document_id).first() if document_id else None
+
+def _save_registry(db: Session, reg: Optional[DocumentRegistry], doc_id: str, filename: str, content_hash: str, sec_count: int, cit_count: int):
     if reg:
-        reg.chunk_count_section, reg.chunk_count_citation, reg.filename = sec_count, cit_count, filename
+        reg.chunk_count_section, reg.chunk_count_citation, reg.filename, reg.content_hash, reg.indexed_at = sec_count, cit_count, filename, content_hash, func.now()
     else:
-        db.add(DocumentRegistry(document_id=doc_id, filename=filename, chunk_count_section=sec_count, chunk_count_citation=cit_count))
-    db.commit()
-    db.query(Project).filter(Project.scope == "ALL_DOCS", Project.status != ProjectStatusEnum.OUTDATED).update({Project.status: ProjectStatusEnum.OUTDATED}, synchronize_session=False)
+        db.add(DocumentRegistry(document_id=doc_id, filename=filename, content_hash=content_hash, chunk_count_section=sec_count, chunk_count_citation=cit_count))
     db.commit()
+
+def run_indexing_and_registry(db: Session, file_path: str, filename: str, document_id: Optional[str] = None, raw_docs: Optional[List[Document]] = None) -> Tuple[str, int, int]:
+    content_hash = file_content_hash(file_path)
+    reg = _unchanged_registry(db, content_hash, document_id)
+    if reg:
+        return reg.document_id, reg.chunk_count_section, reg.chunk_count_citation
+    reg = _previous_version(db, document_id)
+    doc_id, sec_count, cit_count, changed = index_document(file_path, filename, reg.document_id if reg else document_id, raw_docs)
+    _save_registry(db, reg, doc_id, filename, content_hash, sec_count, cit_count)
+    if changed:
+        mark_all_docs_projects_outdated(db, doc_id)
     return doc_id, sec_count, cit_count
+
+@dataclass
+class BulkFile:
+    file_path: str
+    filename: str
+    status: str = "queued"  # queued -> loading -> splitting -> embedding -> storing -> indexed | unchanged | failed
+    document_id: Optional[str] = None
+    sections: int = 0
+    citations: int = 0
+    error: Optional[str] = None
+    content_hash: str = ""
+    raw_docs: List[Document] = field(default_factory=list, repr=False)
+    chunks: Dict[str, Document] = field(default_factory=dict, repr=False)
+    new_ids: List[str] = field(default_factory=list, repr=False)
+    stale_ids: List[str] = field(default_factory=list, repr=False)
+    vectors: Optional[List[List[float]]] = field(default=None, repr=False)
+
+    def summary(self) -> dict:
+        return {"filename": self.filename, "status": self.status, "document_id": self.document_id, "section_count": self.sections, "citation_count": self.citations, "error": self.error}
+
+class _BulkProgress:
+    """Per-file status shared by the stage threads; reports at most once per second except when a file finishes."""
+
+    def __init__(self, files: List[BulkFile], report: Optional[Callable[[dict], None]]):
+        self.files, self.report = files, report
+        self.lock = threading.Lock()
+        self.last_report = 0.0
+
+    def snapshot(self) -> dict:
+        finished = [f for f in self.files if f.status in ("indexed", "unchanged", "failed")]
+        return {"total": len(self.files), "done": sum(f.status != "failed" for f in finished), "failed": sum(f.status == "failed" for f in finished), "files": [f.summary() for f in self.files]}
+
+    def set(self, f: BulkFile, status: str, error: Optional[str] = None):
+        with self.lock:
+            f.status, f.error = status, error
+            now = time.monotonic()
+            if not self.report or (status not in ("indexed", "unchanged", "failed") and now - self.last_report < 1.0):
+                return
+            self.last_report = now
+            progress = self.snapshot()
+        self.report(progress)
+
+def run_bulk_indexing(files: List[Tuple[str, str]], report: Optional[Callable[[dict], None]] = None) -> Tuple[List[BulkFile], List[str]]:
+    # Indexes (file_path, filename) pairs through load -> split -> embed -> store stages that overlap across files,
+    # so loading the next file, embedding (network-bound) and inserting run at the same time. Registry rows are
+    # committed per file; returns the files and the ids of documents whose chunks changed. Uploads are removed.
+    jobs = [BulkFile(path, name) for path, name in files]
+    progress = _BulkProgress(jobs, report)
+    resolve_lock = threading.Lock()
+    batch_hashes: Dict[str, str] = {}
+    changed: List[str] = []
+    vs = get_vector_store_service()
+
+    def resolve(f: BulkFile) -> bool:
+        # Content already indexed (earlier or in this batch) is reused; anything else is a new document. Filenames
+        # are not identities: archive members lose their folders, so fundA/Financials.pdf must not replace another fund's.
+        db = SessionLocal()
+        try:
+            if (doc_id := batch_hashes.get(f.content_hash)) or (reg := _unchanged_registry(db, f.content_hash, None)):
+                f.document_id = doc_id or reg.document_id
+                return False
+            f.document_id = batch_hashes[f.content_hash] = str(uuid.uuid4())
+            return True
+        finally:
+            db.close()
+
+    def load(f: BulkFile) -> Optional[BulkFile]:
+        progress.set(f, "loading")
+        try:
+            f.content_hash = file_content_hash(f.file_path)
+            with resolve_lock:
+                needs_indexing = resolve(f)
+            if not needs_indexing:
+                progress.set(f, "unchanged")
+                return None
+            f.raw_docs = load_document(f.file_path, f.filename, f.document_id)
+        finally:
+            _remove_file(f.file_path)
+        progress.set(f, "splitting")
+        return f
+
+    def split(f: BulkFile) -> BulkFile:
+        f.chunks, f.sections, f.citations = build_chunks(f.raw_docs, f.document_id)
+        f.raw_docs = []
+        f.new_ids, f.stale_ids = diff_chunks(f.chunks, f.document_id, False)
+        progress.set(f, "embedding")
+        return f
+
+    def embed(f: BulkFile) -> BulkFile:
+        f.vectors = vs.embed_documents([f.chunks[i].page_content for i in f.new_ids])
+        progress.set(f, "storing")
+        return f
+
+    def store(f: BulkFile) -> None:
+        store_chunks(f.chunks, f.new_ids, f.stale_ids, f.vectors)
+        db = SessionLocal()
+        try:
+            _save_registry(db, None, f.document_id, f.filename, f.content_hash, f.sections, f.citations)
+        finally:
+            db.close()
+        if f.new_ids or f.stale_ids:
+            with resolve_lock:
+                changed.append(f.document_id)
+        f.chunks, f.vectors = {}, None
+        progress.set(f, "indexed")
+
+    def failed(f: BulkFile, stage: str, e: Exception):
+        logger.warning("Bulk indexing of %s failed in %s: %s", f.filename, stage, e)
+        f.raw_docs, f.chunks, f.vectors = [], {}, None
+        progress.set(f, "failed", str(e))
+
+    stages = [Stage("load", load, settings.BULK_INGEST_LOAD_WORKERS), Stage("split", split), Stage("embed", embed, settings.BULK_INGEST_EMBED_WORKERS), Stage("store", store, settings.BULK_INGEST_STORE_WORKERS)]
+    try:
+        run_stages(jobs, stages, settings.BULK_INGEST_QUEUE_SIZE, failed)
+    finally:
+        for f in jobs:
+            _remove_file(f.file_path)
+    return jobs, changed
+
+def _remove_file(file_path: str):
+    try:
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+    except OSError:
+        pass
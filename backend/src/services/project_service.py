@@ -1,14 +1,41 @@
 from typing import List, Optional
 from sqlalchemy.orm import Session
+from src.core.config import settings
 from src.models.db_models import Project, Question, ProjectStatusEnum
+from src.services.ingestion_service import corpus_fingerprint
 from src.services.questionnaire_parser import ParsedQuestion
+from src.services.reuse_service import prefill_reused_answers
+from src.storage.bulk_writes import bulk_insert_ids
+from src.storage.vector_store import get_vector_store_service
+from src.utils.scope import scope_document_ids  # noqa: F401  (re-exported for callers of the project service)
+
+def embed_questions(questions: List[Question]) -> int:
+    missing = [q for q in questions if q.embedding is None]
+    if not missing:
+        return 0
+    vectors = get_vector_store_service().embed_documents([q.question_text for q in missing])
+    for q, vec in zip(missing, vectors):
+        q.embedding = vec
+    return len(missing)
+
+async def aembed_questions(questions: List[Question]) -> int:
+    missing = [q for q in questions if q.embedding is None]
+    if not missing:
+        return 0
+    vectors = await get_vector_store_service().get_embeddings().aembed_documents([q.question_text for q in missing])
+    for q, vec in zip(missing, vectors):
+        q.embedding = vec
+    return len(missing)
 
 def create_project_from_parsed(db: Session, name: str, parsed: List[ParsedQuestion], questionnaire_document_id: Optional[str] = None, scope: str = "ALL_DOCS") -> Project:
     project = Project(name=name, questionnaire_document_id=questionnaire_document_id, scope=scope, status=ProjectStatusEnum.READY)
     db.add(project)
     db.flush()
-    for pq in parsed:
-        db.add(Question(project_id=project.id, section_id=pq.section_id, section_title=pq.section_title, question_text=pq.question_text, order_index=pq.order_index))
+    # Questions go in as one set-based insert (no per-row ORM objects), however long the questionnaire is.
+    vectors = get_vector_store_service().embed_documents([pq.question_text for pq in parsed])
+    bulk_insert_ids(db, Question, [{"project_id": project.id, "section_id": pq.section_id, "section_title": pq.section_title, "question_text": pq.question_text, "order_index": pq.order_index, "embedding": vec} for pq, vec in zip(parsed, vectors)])
+    if settings.ANSWER_REUSE_ENABLED:
+        prefill_reused_answers(db, project.id, corpus_fingerprint(db))
     db.commit()
     db.refresh(project)
     return project
@@ -0,0 +1,42 @@
+from typing import Dict, Set
+from sqlalchemy import select, true
+from sqlalchemy.orm import Session, aliased, selectinload
+from src.core.config import settings
+from src.models.db_models import Answer, AnswerStatusEnum, Citation, Project, Question
+from src.storage.answer_cache import normalize_question
+from src.storage.bulk_writes import bulk_insert_ids
+
+REUSABLE_STATUSES = (AnswerStatusEnum.CONFIRMED, AnswerStatusEnum.MANUAL_UPDATED)
+
+def _find_matches(db: Session, project: Project, fingerprint: str) -> Dict[int, int]:
+    # question id in `project` -> reusable answer id from another project, answered against the same corpus and scope.
+    src_q = aliased(Question)
+    src_filter = (src_q.project_id != project.id, Project.scope == project.scope, Answer.status.in_(REUSABLE_STATUSES), Answer.corpus_fingerprint == fingerprint)
+    candidates = db.execute(select(src_q.question_text, Answer.id).join(Answer, Answer.question_id == src_q.id).join(Project, Project.id == src_q.project_id).where(*src_filter).order_by(Answer.updated_at, Answer.id)).all()
+    if not candidates:
+        return {}
+    by_text = {normalize_question(t): answer_id for t, answer_id in candidates}  # newest answer wins
+    targets = db.query(Question.id, Question.question_text).filter(Question.project_id == project.id).all()
+    matches = {qid: by_text[n] for qid, t in targets if (n := normalize_question(t)) in by_text}
+    if len(matches) == len(targets):
+        return matches
+    # Nearest reusable question per remaining target, in one LATERAL query that can use the HNSW index on questions.embedding.
+    distance = src_q.embedding.cosine_distance(Question.embedding)
+    nearest = select(Answer.id.label("answer_id"), distance.label("distance")).join(Answer, Answer.question_id == src_q.id).join(Project, Project.id == src_q.project_id).where(*src_filter, src_q.embedding.isnot(None)).order_by(distance, Answer.updated_at.desc()).limit(1).lateral()
+    rows = db.execute(select(Question.id, nearest.c.answer_id, nearest.c.distance).join(nearest, true()).where(Question.project_id == project.id, Question.embedding.isnot(None))).all()
+    max_distance = 1 - settings.ANSWER_REUSE_MIN_SIMILARITY
+    matches.update({qid: answer_id for qid, answer_id, dist in rows if qid not in matches and dist <= max_distance})
+    return matches
+
+def prefill_reused_answers(db: Session, project_id: int, fingerprint: str) -> Set[int]:
+    # Copies matching answers (and citations) into the project; the caller commits. Returns the prefilled question ids.
+    # Copies start PENDING: they were reviewed in the source project, not in this one (reused_from_answer_id says where from).
+    project = db.query(Project).filter(Project.id == project_id).first()
+    matches = _find_matches(db, project, fingerprint) if project else {}
+    if not matches:
+        return set()
+    sources = {a.id: a for a in db.query(Answer).filter(Answer.id.in_(set(matches.values()))).options(selectinload(Answer.citations))}
+    rows = [{"question_id": qid, "answer_text": src.answer_text, "is_answerable": src.is_answerable, "confidence_score": src.confidence_score, "status": AnswerStatusEnum.PENDING, "ai_answer_text": src.ai_answer_text, "manual_answer_text": src.manual_answer_text, "corpus_fingerprint": fingerprint, "reused_from_answer_id": src.id} for qid, src in ((qid, sources[aid]) for qid, aid in matches.items())]
+    answer_ids = dict(zip(matches, bulk_insert_ids(db, Answer, rows)))
+    bulk_insert_ids(db, Citation, [{"answer_id": answer_ids[qid], "chunk_id": c.chunk_id, "document_id": c.document_id, "snippet": c.snippet, "bounding_box_ref": c.bounding_box_ref, "order_index": c.order_index} for qid, aid in matches.items() for c in sources[aid].citations])
+    return set(answer_ids)
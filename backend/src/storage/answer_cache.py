@@ -0,0 +1,61 @@
+import hashlib
+import json
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from src.core.database import engine, get_async_engine
+from src.models.db_models import AnswerCache
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+def normalize_question(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").casefold()).strip()
+
+def prompt_hash(*templates: str) -> str:
+    return hashlib.sha256("\x00".join(templates).encode("utf-8")).hexdigest()
+
+def answer_cache_key(question_text: str, chunk_ids: List[str], model: str, prompt_digest: str) -> str:
+    # Chunk ids are content-addressed, so the same ordered ids mean the same context was sent.
+    return hashlib.sha256("\x00".join([model, prompt_digest, normalize_question(question_text), *chunk_ids]).encode("utf-8")).hexdigest()
+
+def _count(key: str):
+    with _stats_lock:
+        _stats[key] += 1
+
+def _hit(key: str):
+    return update(AnswerCache).where(AnswerCache.cache_key == key).values(hit_count=AnswerCache.hit_count + 1, last_used_at=func.now()).returning(AnswerCache.response)
+
+def _loaded(response: Optional[str]) -> Optional[dict]:
+    _count("hits" if response is not None else "misses")
+    return json.loads(response) if response is not None else None
+
+def _insert(key: str, question_text: str, chunk_ids: List[str], model: str, data: dict):
+    return insert(AnswerCache).values(cache_key=key, model=model, question_text=normalize_question(question_text), chunk_ids=json.dumps(chunk_ids), response=json.dumps(data), hit_count=0).on_conflict_do_nothing(index_elements=["cache_key"])
+
+def get_cached_answer(key: str) -> Optional[dict]:
+    with engine.begin() as conn:
+        return _loaded(conn.execute(_hit(key)).scalar())
+
+def store_cached_answer(key: str, question_text: str, chunk_ids: List[str], model: str, data: dict):
+    with engine.begin() as conn:
+        conn.execute(_insert(key, question_text, chunk_ids, model, data))
+
+async def aget_cached_answer(key: str) -> Optional[dict]:
+    async with get_async_engine().begin() as conn:
+        return _loaded((await conn.execute(_hit(key))).scalar())
+
+async def astore_cached_answer(key: str, question_text: str, chunk_ids: List[str], model: str, data: dict):
+    async with get_async_engine().begin() as conn:
+        await conn.execute(_insert(key, question_text, chunk_ids, model, data))
+
+def answer_cache_stats() -> Dict[str, int]:
+    # hits/misses are for this process; entries/total_hits are persisted across processes.
+    with _stats_lock:
+        stats = {"hits": _stats["hits"], "misses": _stats["misses"]}
+    with engine.connect() as conn:
+        entries, total_hits = conn.execute(select(func.count(AnswerCache.id), func.coalesce(func.sum(AnswerCache.hit_count), 0))).one()
+    return {**stats, "entries": entries, "total_hits": int(total_hits)}
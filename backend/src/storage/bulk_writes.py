@@ -0,0 +1,20 @@
+from typing import List, Type, TypeVar
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+M = TypeVar("M")
+
+# Set-based inserts: SQLAlchemy sends the rows as multi-row INSERT ... VALUES ... RETURNING statements
+# (insertmanyvalues, up to 1000 rows each) and sorts what comes back into input order.
+
+def bulk_insert(db: Session, model: Type[M], rows: List[dict]) -> List[M]:
+    # Returns fully loaded instances (server defaults included), already in the session's identity map.
+    if not rows:
+        return []
+    return list(db.scalars(insert(model).returning(model, sort_by_parameter_order=True), rows))
+
+def bulk_insert_ids(db: Session, model: Type[M], rows: List[dict]) -> List[int]:
+    # For large inserts whose rows the caller does not need as objects.
+    if not rows:
+        return []
+    return list(db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows))
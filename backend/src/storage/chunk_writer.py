@@ -0,0 +1,138 @@
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import text
+from src.core.config import settings
+from src.core.database import engine
+from src.utils.metrics import EMBEDDED_TEXTS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+def _embedding_pool() -> ThreadPoolExecutor:
+    # One pool per process, so EMBEDDING_CONCURRENCY caps in-flight requests across all concurrent ingestions.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, settings.EMBEDDING_CONCURRENCY), thread_name_prefix="embed")
+        return _pool
+
+def _count(**values: float):
+    with _stats_lock:
+        _stats.update(values)
+
+def _retryable(e: Exception) -> bool:
+    # Rate limits, timeouts and server errors are retried; other client errors (bad key, bad input) are not.
+    status = getattr(e, "status_code", None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    openai = sys.modules.get("openai")
+    return isinstance(e, (ConnectionError, TimeoutError)) or (openai is not None and isinstance(e, openai.APIConnectionError))
+
+def _backoff(e: Exception, attempt: int) -> float:
+    retry_after = getattr(getattr(e, "response", None), "headers", {}).get("retry-after")
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return settings.EMBEDDING_RETRY_BASE_SECONDS * 2 ** attempt * (0.5 + random.random())
+
+def _embed_batch(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    for attempt in range(settings.EMBEDDING_MAX_RETRIES + 1):
+        t = time.perf_counter()
+        try:
+            vectors = embeddings.embed_documents(texts)
+            seconds = time.perf_counter() - t
+            _count(embed_seconds=seconds)
+            STAGE_SECONDS.observe(seconds, stage="embed")
+            EMBEDDED_TEXTS.inc(len(texts))
+            return vectors
+        except Exception as e:
+            if attempt == settings.EMBEDDING_MAX_RETRIES or not _retryable(e):
+                raise
+            delay = _backoff(e, attempt)
+            logger.warning("Embedding batch of %d failed (%s); retry %d in %.1fs", len(texts), e, attempt + 1, delay)
+            _count(embed_retries=1)
+            time.sleep(delay)
+
+def _batches(n: int) -> List[slice]:
+    size = max(1, settings.EMBEDDING_BATCH_SIZE)
+    return [slice(i, i + size) for i in range(0, n, size)]
+
+def embed_texts(embeddings: Embeddings, texts: List[str]) -> List[List[float]]:
+    # EMBEDDING_BATCH_SIZE texts per request, up to EMBEDDING_CONCURRENCY requests in flight; order is preserved.
+    if not texts:
+        return []
+    futures = [_embedding_pool().submit(_embed_batch, embeddings, texts[s]) for s in _batches(len(texts))]
+    return [v for f in futures for v in f.result()]
+
+def _vector_literal(vector: Sequence[float]) -> str:
+    return "[" + ",".join(map(str, vector)) + "]"
+
+def copy_chunks(table: str, ids: List[str], texts: List[str], vectors: List[List[float]], metadatas: List[dict]):
+    # COPY into a transaction-scoped staging table, then one INSERT ... SELECT that upserts like PGVectorStore
+    # does, instead of its INSERT and commit per row. The generated tsvector column fills itself.
+    if not ids:
+        return
+    t = time.perf_counter()
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TEMP TABLE chunk_stage (langchain_id text, content text, embedding text, langchain_metadata text) ON COMMIT DROP")
+        with conn.connection.driver_connection.cursor() as cur, cur.copy("COPY chunk_stage FROM STDIN") as copy:
+            for row in zip(ids, texts, map(_vector_literal, vectors), map(json.dumps, metadatas)):
+                copy.write_row(row)
+        conn.exec_driver_sql(f'INSERT INTO "{table}" (langchain_id, content, embedding, langchain_metadata) SELECT langchain_id, content, embedding::vector, langchain_metadata::json FROM chunk_stage ON CONFLICT (langchain_id) DO UPDATE SET content = EXCLUDED.content, embedding = EXCLUDED.embedding, langchain_metadata = EXCLUDED.langchain_metadata')
+    seconds = time.perf_counter() - t
+    _count(insert_seconds=seconds)
+    STAGE_SECONDS.observe(seconds, stage="vector_insert")
+
+def _delete_written(table: str, ids: List[str]):
+    if not ids:
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f'DELETE FROM "{table}" WHERE langchain_id = ANY(:ids)'), {"ids": ids})
+    except Exception:
+        logger.exception("Could not remove %d chunks written before a failed batch", len(ids))
+
+def write_chunks(table: str, embeddings: Embeddings, ids: List[str], texts: List[str], metadatas: List[dict], vectors: Optional[List[List[float]]] = None):
+    # Without precomputed vectors, each embedded batch is copied in as soon as it (and the batches before it)
+    # are done, so inserting overlaps with the embedding requests still in flight.
+    t = time.perf_counter()
+    if vectors is not None:
+        copy_chunks(table, ids, texts, vectors, metadatas)
+    else:
+        batches, written = _batches(len(ids)), []
+        futures = [_embedding_pool().submit(_embed_batch, embeddings, texts[s]) for s in batches]
+        try:
+            for s, f in zip(batches, futures):
+                copy_chunks(table, ids[s], texts[s], f.result(), metadatas[s])
+                written += ids[s]
+        except BaseException:
+            # All or nothing, like embedding everything first: a failed batch must not leave earlier batches
+            # behind as chunks without a registry row (callers only write ids that were not stored before).
+            for f in futures:
+                f.cancel()
+            _delete_written(table, written)
+            raise
+    seconds = time.perf_counter() - t
+    _count(chunks=len(ids), seconds=seconds)
+    if ids:
+        logger.info("Wrote %d chunks in %.2fs (%.0f chunks/s)", len(ids), seconds, len(ids) / seconds if seconds else 0.0)
+
+def ingest_stats() -> Dict[str, float]:
+    # Totals for this process since start. chunks_per_second is over wall time in write_chunks; embed_seconds sums
+    # the (overlapping) embedding requests.
+    with _stats_lock:
+        stats = dict(_stats)
+    chunks, seconds = stats.get("chunks", 0), stats.get("seconds", 0.0)
+    return {"chunks": int(chunks), "seconds": round(seconds, 3), "chunks_per_second": round(chunks / seconds, 1) if seconds else 0.0, "embed_seconds": round(stats.get("embed_seconds", 0.0), 3), "insert_seconds": round(stats.get("insert_seconds", 0.0), 3), "embed_retries": int(stats.get("embed_retries", 0))}
@@ -1,2 +1,2 @@
-from src.core.database import Base, engine, get_db, SessionLocal
-__all__ = ["Base", "engine", "get_db", "SessionLocal"]
+from src.core.database import AsyncSessionLocal, Base, engine, get_async_db, get_db, SessionLocal
+__all__ = ["AsyncSessionLocal", "Base", "engine", "get_async_db", "get_db", "SessionLocal"]
@@ -0,0 +1,95 @@
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, List
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from src.core.config import settings
+from src.core.database import engine
+from src.models.db_models import EmbeddingCache
+
+_BATCH_SIZE = 1000
+_EVICT_BATCH_SIZE = 5000
+_EVICT_SLACK = 0.1  # evict once the table is 10% over max_entries, back down to max_entries
+
+logger = logging.getLogger(__name__)
+_evict_lock = threading.Lock()
+_next_evict_check = 0.0
+
+def embedding_cache_key(text: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+def evict_embedding_cache(max_entries: int) -> int:
+    # Least recently used entries beyond max_entries, deleted oldest first in bounded batches (index on
+    # last_used_at), each in its own transaction, so no statement walks or locks the whole table.
+    with engine.connect() as conn:
+        excess = conn.execute(select(func.count()).select_from(EmbeddingCache)).scalar() - max_entries
+    if excess <= max_entries * _EVICT_SLACK:
+        return 0
+    deleted = 0
+    while deleted < excess:
+        oldest = select(EmbeddingCache.id).order_by(EmbeddingCache.last_used_at).limit(min(_EVICT_BATCH_SIZE, excess - deleted))
+        with engine.begin() as conn:
+            n = conn.execute(delete(EmbeddingCache).where(EmbeddingCache.id.in_(oldest))).rowcount
+        if not n:
+            break
+        deleted += n
+    logger.info("Evicted %d embedding cache entries", deleted)
+    return deleted
+
+def _maybe_evict(max_entries: int):
+    # At most one check per EMBEDDING_CACHE_EVICT_INTERVAL_SECONDS per process, by whichever thread gets there
+    # first; concurrent stores never wait for it.
+    global _next_evict_check
+    if time.monotonic() < _next_evict_check or not _evict_lock.acquire(blocking=False):
+        return
+    try:
+        _next_evict_check = time.monotonic() + settings.EMBEDDING_CACHE_EVICT_INTERVAL_SECONDS
+        evict_embedding_cache(max_entries)
+    except Exception as e:
+        logger.warning("Embedding cache eviction failed: %s", e)
+    finally:
+        _evict_lock.release()
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends texts missing from the embedding_cache table to the underlying model."""
+
+    def __init__(self, underlying: Embeddings, model: str, max_entries: int = settings.EMBEDDING_CACHE_MAX_ENTRIES):
+        self.underlying = underlying
+        self.model = model
+        self.max_entries = max_entries
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        with engine.begin() as conn:
+            for i in range(0, len(keys), _BATCH_SIZE):
+                batch = keys[i:i + _BATCH_SIZE]
+                rows = conn.execute(select(EmbeddingCache.content_hash, EmbeddingCache.embedding).where(EmbeddingCache.content_hash.in_(batch))).all()
+                found.update((h, [float(x) for x in emb]) for h, emb in rows)
+                if rows:
+                    conn.execute(update(EmbeddingCache).where(EmbeddingCache.content_hash.in_([h for h, _ in rows])).values(last_used_at=func.now()))
+        return found
+
+    def _store(self, vectors: Dict[str, List[float]]):
+        with engine.begin() as conn:
+            rows = [{"content_hash": h, "model": self.model, "embedding": v} for h, v in vectors.items()]
+            for i in range(0, len(rows), _BATCH_SIZE):
+                conn.execute(insert(EmbeddingCache).values(rows[i:i + _BATCH_SIZE]).on_conflict_do_nothing(index_elements=["content_hash"]))
+        _maybe_evict(self.max_entries)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        keys = [embedding_cache_key(t, self.model) for t in texts]
+        vectors = self._lookup(list(dict.fromkeys(keys)))
+        misses = {k: t for k, t in zip(keys, texts) if k not in vectors}
+        if misses:
+            fresh = dict(zip(misses.keys(), self.underlying.embed_documents(list(misses.values()))))
+            self._store(fresh)
+            vectors.update(fresh)
+        return [vectors[k] for k in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
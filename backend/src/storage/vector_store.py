@@ -1,21 +1,95 @@
+import asyncio
+import logging
+import math
 import os
-from typing import List, Optional
+import re
+import threading
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
 from langchain_core.documents import Document
-from langchain_core.vectorstores import VectorStoreRetriever
-from langchain_openai import OpenAIEmbeddings
-from langchain_postgres import Column, PGEngine, PGVectorStore
+from sqlalchemy import text
 from src.core.config import settings
+from src.core.database import engine as db_engine, get_async_engine
+from src.storage.chunk_writer import embed_texts, write_chunks
 from src.utils.db_uri import normalize_db_uri_for_pgvector
 
+logger = logging.getLogger(__name__)
+
+TSV_COLUMN = "content_tsv"
+_IDENTIFIER = re.compile(r"^\w+$")
+
+@dataclass
+class IndexQueryOptions:
+    # langchain_postgres QueryOptions interface; PGVectorStore issues each entry as SET LOCAL before the vector query.
+    parameters: List[str] = field(default_factory=list)
+
+    def to_parameter(self) -> List[str]:
+        return self.parameters
+
+    def to_string(self) -> str:
+        return ", ".join(self.parameters)
+
+def _index_query_options(index_type: str) -> Optional[IndexQueryOptions]:
+    iterative = settings.VECTOR_INDEX_ITERATIVE_SCAN
+    if iterative and not _IDENTIFIER.match(iterative):
+        raise ValueError("Invalid VECTOR_INDEX_ITERATIVE_SCAN")
+    if index_type == "hnsw":
+        params = [f"hnsw.ef_search = {int(settings.VECTOR_INDEX_EF_SEARCH)}"]
+    elif index_type == "ivfflat":
+        params = [f"ivfflat.probes = {int(settings.VECTOR_INDEX_PROBES)}"]
+    else:
+        return None
+    return IndexQueryOptions(params + ([f"{index_type}.iterative_scan = {iterative}"] if iterative else []))
+
+def _embedding_model():
+    # langchain_openai/openai take ~1s to import; they load with the vector store, not with the app.
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model=settings.EMBEDDING_MODEL, api_key=settings.OPENAI_API_KEY or os.environ.get("OPENAI_API_KEY"))
+
+def reciprocal_rank_fusion(rankings: Sequence[List[str]], weights: Sequence[float], rrf_k: int = 60) -> List[str]:
+    scores: Dict[str, float] = defaultdict(float)
+    for ids, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ids):
+            scores[doc_id] += weight / (rrf_k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+def metadata_filter_sql(filter: Optional[dict]) -> Tuple[str, dict]:
+    # Equality and $in on top-level metadata keys, the subset of PGVectorStore filters this app uses.
+    clauses, params = [], {}
+    for i, (key, cond) in enumerate((filter or {}).items()):
+        if not _IDENTIFIER.match(key):
+            raise ValueError(f"Invalid metadata filter key: {key}")
+        if isinstance(cond, dict) and set(cond) == {"$eq"}:
+            cond = cond["$eq"]
+        if isinstance(cond, dict) and set(cond) == {"$in"}:
+            clauses.append(f"langchain_metadata->>'{key}' = ANY(:f{i})")
+            params[f"f{i}"] = [str(v) for v in cond["$in"]]
+        elif not isinstance(cond, (dict, list)):
+            clauses.append(f"langchain_metadata->>'{key}' = :f{i}")
+            params[f"f{i}"] = str(cond)
+        else:
+            raise ValueError(f"Unsupported metadata filter for {key}: {cond}")
+    return " AND ".join(clauses), params
+
 class VectorStoreService:
     def __init__(self):
         self._engine = None
         self._vector_store = None
         self._initialized = False
+        self._init_lock = threading.Lock()
 
     def _ensure_initialized(self):
         if self._initialized:
             return
+        with self._init_lock:
+            if not self._initialized:
+                self._initialize()
+
+    def _initialize(self):
+        from langchain_postgres import Column, PGEngine, PGVectorStore
+        from src.storage.embedding_cache import CachedEmbeddings
         db_url = settings.DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://").replace("postgresql+psycopg://", "postgresql://")
         normalized = normalize_db_uri_for_pgvector(db_url)
         if normalized.startswith("postgresql://") and "+" not in normalized:
@@ -32,13 +106,84 @@ class VectorStoreService:
             pass
         if not os.environ.get("OPENAI_API_KEY") and settings.OPENAI_API_KEY:
             os.environ["OPENAI_API_KEY"] = settings.OPENAI_API_KEY
+        embeddings = _embedding_model()
+        if settings.EMBEDDING_CACHE_ENABLED:
+            embeddings = CachedEmbeddings(embeddings, model=settings.EMBEDDING_MODEL)
         self._vector_store = PGVectorStore.create_sync(
             engine=self._engine,
             table_name=settings.VECTOR_STORE_TABLE_NAME,
-            embedding_service=OpenAIEmbeddings(api_key=settings.OPENAI_API_KEY or os.environ.get("OPENAI_API_KEY")),
+            embedding_service=embeddings,
+            index_query_options=_index_query_options(settings.VECTOR_INDEX_TYPE.lower()),
         )
         self._initialized = True
 
+    def ensure_indexes(self) -> threading.Thread:
+        # Called at process startup. The hybrid tsvector column is added here, since keyword queries need it; the
+        # document_id and ANN indexes are built CONCURRENTLY on a background thread, so serving never waits for a
+        # build on a large table (or for the open transactions a concurrent build waits behind) and writes go on.
+        self._ensure_initialized()
+        if settings.RETRIEVAL_HYBRID:
+            self._ensure_keyword_index()
+        thread = threading.Thread(target=self._build_indexes, args=(settings.VECTOR_INDEX_TYPE.lower(),), name="index-build", daemon=True)
+        thread.start()
+        return thread
+
+    def _build_indexes(self, index_type: str):
+        try:
+            self._ensure_document_id_index()
+            self._ensure_vector_indexes(index_type)
+        except Exception:
+            logger.exception("Index build failed")
+
+    def _ensure_keyword_index(self):
+        # Generated column keeps the tsvector in sync for rows written by PGVectorStore, old and new.
+        table, lang = settings.VECTOR_STORE_TABLE_NAME, settings.HYBRID_TSV_LANG
+        if not (_IDENTIFIER.match(table) and _IDENTIFIER.match(lang)):
+            raise ValueError("Invalid VECTOR_STORE_TABLE_NAME or HYBRID_TSV_LANG")
+        with db_engine.begin() as conn:
+            conn.execute(text(f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS {TSV_COLUMN} tsvector GENERATED ALWAYS AS (to_tsvector(\'{lang}\'::regconfig, content)) STORED'))
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS "{table}_{TSV_COLUMN}_idx" ON "{table}" USING gin ({TSV_COLUMN})'))
+
+    def _ensure_document_id_index(self):
+        # Scope filters compare langchain_metadata->>'document_id'; the expression index lets the planner
+        # fetch a small scope directly instead of post-filtering ANN candidates. Built outside a transaction, as
+        # CONCURRENTLY requires; an invalid index left by an interrupted build is dropped and built again.
+        table = settings.VECTOR_STORE_TABLE_NAME
+        name = f"{table}_document_id_idx"
+        with db_engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT")
+            valid = conn.execute(text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"), {"name": name}).scalar()
+            if valid:
+                return
+            if valid is False:
+                conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+            logger.info("Building index %s on %s", name, table)
+            conn.execute(text(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{name}" ON "{table}" ((langchain_metadata->>\'document_id\'))'))
+
+    def _ensure_vector_indexes(self, index_type: str):
+        from langchain_postgres.v2.indexes import DEFAULT_INDEX_NAME_SUFFIX, HNSWIndex, IVFFlatIndex
+        table = settings.VECTOR_STORE_TABLE_NAME
+        name = f"{table}{DEFAULT_INDEX_NAME_SUFFIX}"
+        with db_engine.begin() as conn:
+            current = conn.execute(text("SELECT pg_get_indexdef(i.indexrelid), i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"), {"name": name}).first()
+            rows = conn.execute(text(f'SELECT count(*) FROM "{table}"')).scalar() if index_type == "ivfflat" else 0
+        if index_type not in ("hnsw", "ivfflat") or (current and current[1] and f"USING {index_type} " in current[0]):
+            return
+        if index_type == "ivfflat":
+            if rows < settings.VECTOR_INDEX_IVFFLAT_MIN_ROWS:
+                return
+            index = IVFFlatIndex(name=name, lists=settings.VECTOR_INDEX_IVFFLAT_LISTS or max(1, rows // 1000 if rows <= 1_000_000 else int(math.sqrt(rows))))
+        else:
+            index = HNSWIndex(name=name, m=settings.VECTOR_INDEX_HNSW_M, ef_construction=settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION)
+        try:
+            if current:
+                self._vector_store.drop_vector_index(name)
+            logger.info("Building %s index %s on %s", index_type, name, table)
+            self._vector_store.apply_vector_index(index, name, concurrently=True)
+        except Exception:
+            # Another process may be building the same index concurrently.
+            logger.exception("Could not build vector index %s", name)
+
     def get_retriever(self, search_type: str = "similarity", search_kwargs: Optional[dict] = None):
         self._ensure_initialized()
         kwargs = search_kwargs or {}
@@ -46,9 +191,92 @@ class VectorStoreService:
             kwargs["k"] = 5
         return self._vector_store.as_retriever(search_type=search_type, search_kwargs=kwargs)
 
+    def get_embeddings(self):
+        self._ensure_initialized()
+        return self._vector_store.embeddings
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 5, filter: Optional[dict] = None) -> List[Document]:
+        self._ensure_initialized()
+        return self._vector_store.similarity_search_by_vector(embedding, k=k, filter=filter)
+
+    async def asimilarity_search_by_vector(self, embedding: List[float], k: int = 5, filter: Optional[dict] = None) -> List[Document]:
+        # PGVectorStore runs the query on its own engine loop and awaits it from the caller's loop.
+        self._ensure_initialized()
+        return await self._vector_store.asimilarity_search_by_vector(embedding, k=k, filter=filter)
+
+    def _keyword_query(self, query: str, k: int, filter: Optional[dict]):
+        # OR over the query's lexemes (plainto_tsquery would AND them all). Chunks matching more distinct
+        # lexemes rank first, so a repeated common word cannot outrank an exact multi-term hit.
+        where, params = metadata_filter_sql(filter)
+        sql = f"""WITH terms AS (SELECT to_tsquery('simple', quote_literal(lexeme)) AS t FROM unnest(to_tsvector(CAST(:lang AS regconfig), :query))),
+        query AS (SELECT tsquery_or FROM (SELECT to_tsquery('simple', string_agg(quote_literal(lexeme), ' | ')) AS tsquery_or FROM unnest(to_tsvector(CAST(:lang AS regconfig), :query))) s)
+        SELECT langchain_id FROM "{settings.VECTOR_STORE_TABLE_NAME}", query WHERE {TSV_COLUMN} @@ query.tsquery_or {"AND " + where if where else ""}
+        ORDER BY (SELECT count(*) FROM terms WHERE {TSV_COLUMN} @@ terms.t) DESC, ts_rank_cd({TSV_COLUMN}, query.tsquery_or) DESC LIMIT :k"""
+        return text(sql), {**params, "lang": settings.HYBRID_TSV_LANG, "query": query, "k": k}
+
+    def keyword_search_ids(self, query: str, k: int = 20, filter: Optional[dict] = None) -> List[str]:
+        self._ensure_initialized()
+        with db_engine.connect() as conn:
+            return list(conn.execute(*self._keyword_query(query, k, filter)).scalars())
+
+    async def akeyword_search_ids(self, query: str, k: int = 20, filter: Optional[dict] = None) -> List[str]:
+        self._ensure_initialized()
+        async with get_async_engine().connect() as conn:
+            return list((await conn.execute(*self._keyword_query(query, k, filter))).scalars())
+
+    @staticmethod
+    def _fuse(dense: List[Document], keyword_ids: List[str], k: int) -> Tuple[List[str], Dict[str, Document]]:
+        fused = reciprocal_rank_fusion([[d.id for d in dense], keyword_ids], [settings.HYBRID_VECTOR_WEIGHT, settings.HYBRID_KEYWORD_WEIGHT], settings.HYBRID_RRF_K)[:k]
+        return fused, {d.id: d for d in dense}
+
+    def hybrid_search_by_vector(self, query: str, embedding: List[float], k: int = 5, filter: Optional[dict] = None) -> List[Document]:
+        dense = self.similarity_search_by_vector(embedding, k=settings.HYBRID_VECTOR_K, filter=filter)
+        fused, by_id = self._fuse(dense, self.keyword_search_ids(query, settings.HYBRID_KEYWORD_K, filter), k)
+        by_id.update({d.id: d for d in self.get_by_ids([i for i in fused if i not in by_id])})
+        return [by_id[i] for i in fused if i in by_id]
+
+    async def ahybrid_search_by_vector(self, query: str, embedding: List[float], k: int = 5, filter: Optional[dict] = None) -> List[Document]:
+        dense, keyword_ids = await asyncio.gather(self.asimilarity_search_by_vector(embedding, k=settings.HYBRID_VECTOR_K, filter=filter), self.akeyword_search_ids(query, settings.HYBRID_KEYWORD_K, filter))
+        fused, by_id = self._fuse(dense, keyword_ids, k)
+        by_id.update({d.id: d for d in await self.aget_by_ids([i for i in fused if i not in by_id])})
+        return [by_id[i] for i in fused if i in by_id]
+
+    def get_by_ids(self, ids: List[str]) -> List[Document]:
+        if not ids:
+            return []
+        self._ensure_initialized()
+        return self._vector_store.get_by_ids(ids)
+
+    async def aget_by_ids(self, ids: List[str]) -> List[Document]:
+        if not ids:
+            return []
+        self._ensure_initialized()
+        return await self._vector_store.aget_by_ids(ids)
+
     def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        # Batched, concurrent embedding and COPY-based inserts (chunk_writer) instead of PGVectorStore's row-at-a-time path.
+        ids = ids or [d.id or str(uuid.uuid4()) for d in documents]
+        write_chunks(settings.VECTOR_STORE_TABLE_NAME, self.get_embeddings(), ids, [d.page_content for d in documents], [d.metadata for d in documents])
+        return ids
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return embed_texts(self.get_embeddings(), texts)
+
+    def add_embeddings(self, texts: List[str], embeddings: List[List[float]], metadatas: List[dict], ids: List[str]) -> List[str]:
+        # For callers that embed in a separate step (bulk ingestion), so the insert does not embed again.
+        self._ensure_initialized()
+        write_chunks(settings.VECTOR_STORE_TABLE_NAME, self.get_embeddings(), ids, texts, metadatas, vectors=embeddings)
+        return ids
+
+    def get_document_chunk_ids(self, document_id: str) -> List[str]:
+        self._ensure_initialized()
+        return self._vector_store.get(where={"document_id": document_id}, include=[])["ids"]
+
+    def delete(self, ids: List[str]) -> None:
+        if not ids:
+            return
         self._ensure_initialized()
-        return self._vector_store.add_documents(documents=documents, ids=ids)
+        self._vector_store.delete(ids=ids)
 
 _vector_store_service = None
 def get_vector_store_service():
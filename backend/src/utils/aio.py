@@ -0,0 +1,33 @@
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Async clients (DB pools, HTTP connection pools) are bound to the loop that created them. The API loop and
+# the worker's job loop each get their own instance instead of sharing one across loops.
+_loop_resources: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = weakref.WeakKeyDictionary()
+_resources_lock = threading.Lock()
+_runner_loop: Optional[asyncio.AbstractEventLoop] = None
+_runner_lock = threading.Lock()
+
+def loop_local(key: str, factory: Callable[[], T]) -> T:
+    loop = asyncio.get_running_loop()
+    with _resources_lock:
+        resources = _loop_resources.setdefault(loop, {})
+        if key not in resources:
+            resources[key] = factory()
+        return resources[key]
+
+def _runner() -> asyncio.AbstractEventLoop:
+    global _runner_loop
+    with _runner_lock:
+        if _runner_loop is None:
+            _runner_loop = asyncio.new_event_loop()
+            threading.Thread(target=_runner_loop.run_forever, name="async-jobs", daemon=True).start()
+        return _runner_loop
+
+def run_coroutine_sync(coro: Awaitable[Any]) -> Any:
+    # Runs `coro` on one long-lived background loop, so loop-local pools are reused across worker jobs.
+    return asyncio.run_coroutine_threadsafe(coro, _runner()).result()
@@ -1,25 +1,46 @@
+import math
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from itertools import repeat
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from langchain_core.documents import Document
+from src.core.config import settings
 
-try:
-    from langchain_pymupdf4llm import PyMuPDF4LLMLoader
-except ImportError:
-    PyMuPDF4LLMLoader = None
-try:
-    from langchain_community.document_loaders import UnstructuredFileLoader, UnstructuredWordDocumentLoader, TextLoader
-except ImportError:
-    UnstructuredFileLoader = UnstructuredWordDocumentLoader = TextLoader = None
+pymupdf = Blob = PyMuPDF4LLMLoader = PyMuPDF4LLMParser = None
+UnstructuredFileLoader = UnstructuredWordDocumentLoader = TextLoader = None
+_loaders_imported = False
+_import_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def import_loaders():
+    # PyMuPDF/Unstructured are imported on first use (or by the startup warm-up), not when the app is imported.
+    global _loaders_imported, pymupdf, Blob, PyMuPDF4LLMLoader, PyMuPDF4LLMParser, UnstructuredFileLoader, UnstructuredWordDocumentLoader, TextLoader
+    with _import_lock:
+        if _loaders_imported:
+            return
+        try:
+            import pymupdf
+            from langchain_core.documents.base import Blob
+            from langchain_pymupdf4llm import PyMuPDF4LLMLoader, PyMuPDF4LLMParser
+        except ImportError:
+            pass
+        try:
+            from langchain_community.document_loaders import UnstructuredFileLoader, UnstructuredWordDocumentLoader, TextLoader
+        except ImportError:
+            pass
+        _loaders_imported = True
 
 def get_file_type(filename: str) -> str:
     ext = Path(filename).suffix.lower()
     m = {".pdf": "pdf", ".docx": "docx", ".doc": "docx", ".xlsx": "xlsx", ".pptx": "pptx", ".txt": "txt", ".md": "txt"}
     return m.get(ext, "unknown")
 
-def load_documents_from_file_sync(file_path: str, file_type: str) -> List[Document]:
-    if not os.path.isfile(file_path):
-        raise ValueError(f"File not found: {file_path}")
+def _load_file(file_path: str, file_type: str) -> List[Document]:
+    import_loaders()
     if file_type == "pdf" and PyMuPDF4LLMLoader:
         return PyMuPDF4LLMLoader(file_path).load()
     if file_type == "docx" and UnstructuredWordDocumentLoader:
@@ -29,3 +50,64 @@ def load_documents_from_file_sync(file_path: str, file_type: str) -> List[Docume
     if UnstructuredFileLoader:
         return UnstructuredFileLoader(file_path).load()
     raise ValueError(f"Unsupported type or missing loader: {file_type}")
+
+def _load_pdf_pages(file_path: str, start: int, stop: int) -> List[Document]:
+    # Runs in a worker process: parse pages [start, stop) as a standalone PDF, then restore page numbers.
+    import_loaders()
+    with pymupdf.open(file_path) as src:
+        total = len(src)
+        if start == 0 and stop >= total:
+            return PyMuPDF4LLMLoader(file_path).load()
+        source_meta = src.metadata or {}
+        with pymupdf.open() as shard:
+            shard.insert_pdf(src, from_page=start, to_page=stop - 1)
+            shard.set_metadata(source_meta)
+            data = shard.tobytes()
+    docs = list(PyMuPDF4LLMParser(mode="page").lazy_parse(Blob.from_data(data, path=file_path)))
+    for d in docs:
+        # The shard is a re-serialised PDF: its own values (e.g. "format", the PDF version) give way to the source's.
+        d.metadata.update({k: v for k, v in source_meta.items() if k in d.metadata})
+        d.metadata["page"] = d.metadata.get("page", 0) + start
+        d.metadata["total_pages"] = total
+    return docs
+
+def _loader_workers() -> int:
+    return settings.LOADER_WORKERS or os.cpu_count() or 1
+
+def get_loader_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: the API process runs threads (DB pools, vector store loop) that must not be forked.
+            _pool = ProcessPoolExecutor(max_workers=_loader_workers(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+def warm_loader_pool():
+    # Spawned workers start empty; make each import the loader libraries before the first upload arrives.
+    import_loaders()
+    if _loader_workers() > 1:
+        pool = get_loader_pool()
+        wait([pool.submit(import_loaders) for _ in range(_loader_workers())])
+
+def shutdown_loader_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def load_documents_from_file_sync(file_path: str, file_type: str) -> List[Document]:
+    if not os.path.isfile(file_path):
+        raise ValueError(f"File not found: {file_path}")
+    import_loaders()
+    if _loader_workers() <= 1:
+        return _load_file(file_path, file_type)
+    pool = get_loader_pool()
+    if file_type == "pdf" and PyMuPDF4LLMLoader:
+        with pymupdf.open(file_path) as doc:
+            total = len(doc)
+        shard = max(settings.LOADER_MIN_PAGES_PER_SHARD, math.ceil(total / _loader_workers()))
+        starts = list(range(0, total, shard)) or [0]
+        # map() yields shards in submission order, so pages come back in document order.
+        return [d for docs in pool.map(_load_pdf_pages, repeat(file_path), starts, [min(s + shard, total) for s in starts]) for d in docs]
+    return pool.submit(_load_file, file_path, file_type).result()
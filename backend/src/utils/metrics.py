@@ -0,0 +1,148 @@
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# In-process metrics in the Prometheus text format. An observation is one bisect and two additions under a lock
+# (a couple of microseconds, against stages that take milliseconds), so hot paths are instrumented directly and
+# everything that needs a query is read at scrape time instead. Values are per process: the API serves
+# its own (including the embedded worker's) on /metrics, a standalone worker on WORKER_METRICS_PORT.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+Sample = Tuple[str, str, float]  # metric name (with suffix), rendered labels, value
+
+_registry: List["_Metric"] = []
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> tuple:
+        return tuple([labels.get(n, "") for n in self.labelnames])
+
+    def _labels(self, key: tuple, extra: Iterable[Tuple[str, str]] = ()) -> str:
+        pairs = [*zip(self.labelnames, key), *extra]
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, self._labels(k), v) for k, v in self._values.items()]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self._bounds = tuple(sorted(buckets))
+        self._values: Dict[tuple, list] = {}  # per label set: count per bucket (+Inf last), then the sum
+
+    def observe(self, value: float, **labels: str):
+        key, i = self._key(labels), bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            v = self._values.get(key)
+            if v is None:
+                v = self._values[key] = [0] * (len(self._bounds) + 1) + [0.0]
+            v[i] += 1
+            v[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            values = [(k, list(v)) for k, v in self._values.items()]
+        out = []
+        for key, v in values:
+            cumulative = 0
+            for bound, n in zip((*self._bounds, math.inf), v):
+                cumulative += n
+                out.append((f"{self.name}_bucket", self._labels(key, [("le", _format_value(bound))]), cumulative))
+            out += [(f"{self.name}_sum", self._labels(key), v[-1]), (f"{self.name}_count", self._labels(key), cumulative)]
+        return out
+
+class Gauge(_Metric):
+    """Read at scrape time: `collect` returns (label values, value) pairs, so nothing is tracked on the hot path."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Iterable[Tuple[tuple, float]]], labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._collect = collect
+
+    def samples(self) -> List[Sample]:
+        return [(self.name, self._labels(tuple(map(str, key))), value) for key, value in self._collect()]
+
+def render() -> str:
+    lines = []
+    for metric in list(_registry):
+        try:
+            samples = metric.samples()
+        except Exception as e:
+            logger.warning("Metric %s not collected: %s", metric.name, e)
+            continue
+        lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.kind}"]
+        lines += [f"{name}{labels} {_format_value(value)}" for name, labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(port: int) -> ThreadingHTTPServer:
+    # For processes without the API (standalone workers): any GET path returns the metrics.
+    server = ThreadingHTTPServer(("", port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+STAGE_SECONDS = Histogram("dd_stage_duration_seconds", "Duration of pipeline stages: load, split, embed (per batch), vector_insert (per COPY), retrieval, llm (per call), db_commit, evaluation.", ("stage",))
+LLM_TOKENS = Counter("dd_llm_tokens_total", "Chat model tokens, provider-reported where available, otherwise counted locally.", ("kind",))
+EMBEDDED_TEXTS = Counter("dd_embedded_texts_total", "Texts sent to the embedding model by batched embedding.")
+DB_CHECKOUTS = Counter("dd_db_pool_checkouts_total", "Connections checked out of the SQLAlchemy pools.", ("pool",))
+DB_CONNECTION_HELD = Histogram("dd_db_connection_held_seconds", "Time a connection stays checked out of its pool.", ("pool",))
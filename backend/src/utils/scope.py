@@ -0,0 +1,9 @@
+import json
+from typing import List, Optional
+
+def scope_document_ids(scope: Optional[str]) -> Optional[List[str]]:
+    # "ALL_DOCS" (or empty) means no restriction; otherwise a JSON array or comma-separated list of document ids.
+    if not scope or scope.strip().upper() == "ALL_DOCS":
+        return None
+    ids = json.loads(scope) if scope.lstrip().startswith("[") else scope.split(",")
+    return [str(i).strip() for i in ids if str(i).strip()] or None
@@ -0,0 +1,9 @@
+import json
+from typing import Any
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+SSE_KEEPALIVE = ": keepalive\n\n"
+
+def sse_event(event: str, data: Any) -> str:
+    payload = data if isinstance(data, str) else json.dumps(data, separators=(",", ":"), default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
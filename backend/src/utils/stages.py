@@ -0,0 +1,54 @@
+import logging
+import queue
+import threading
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+class Stage(NamedTuple):
+    name: str
+    fn: Callable[[Any], Optional[Any]]  # returns the item for the next stage, or None when the item is finished
+    workers: int = 1
+
+def run_stages(items: Iterable[Any], stages: List[Stage], queue_size: int, on_error: Callable[[Any, str, Exception], None]):
+    # Stages run concurrently on their own threads, connected by bounded queues, so a slow stage applies
+    # backpressure instead of letting finished work pile up in memory. A failing item is reported and dropped.
+    queues = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+    remaining = [s.workers for s in stages]
+    lock = threading.Lock()
+
+    def work(i: int):
+        stage, inbox = stages[i], queues[i]
+        try:
+            while (item := inbox.get()) is not _DONE:
+                try:
+                    out = stage.fn(item)
+                except Exception as e:
+                    try:
+                        on_error(item, stage.name, e)
+                    except Exception:
+                        logger.exception("Error handler failed in stage %s", stage.name)
+                    continue
+                if out is not None and i + 1 < len(stages):
+                    queues[i + 1].put(out)
+        finally:
+            with lock:
+                remaining[i] -= 1
+                last = remaining[i] == 0
+            if last and i + 1 < len(stages):
+                for _ in range(stages[i + 1].workers):
+                    queues[i + 1].put(_DONE)
+
+    threads = [threading.Thread(target=work, args=(i,), name=f"stage-{s.name}-{n}", daemon=True) for i, s in enumerate(stages) for n in range(s.workers)]
+    for t in threads:
+        t.start()
+    try:
+        for item in items:
+            queues[0].put(item)
+    finally:
+        for _ in range(stages[0].workers):
+            queues[0].put(_DONE)
+        for t in threads:
+            t.join()
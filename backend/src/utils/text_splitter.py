@@ -1,9 +1,18 @@
-from typing import List
+from typing import TYPE_CHECKING, Iterator, List, Tuple
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+if TYPE_CHECKING:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+SECTION_CHUNK_SIZE, SECTION_CHUNK_OVERLAP = 1000, 200
+CITATION_CHUNK_SIZE, CITATION_CHUNK_OVERLAP = 400, 50
+
+def _splitter(chunk_size: int, chunk_overlap: int) -> "RecursiveCharacterTextSplitter":
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+    return RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len, separators=["\n\n", "\n", ". ", " ", ""])
 
 def _split(documents: List[Document], chunk_size: int, chunk_overlap: int, chunk_type: str) -> List[Document]:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len, separators=["\n\n", "\n", ". ", " ", ""])
+    splitter = _splitter(chunk_size, chunk_overlap)
     out = []
     for doc in splitter.split_documents(documents):
         meta = dict(doc.metadata)
@@ -12,7 +21,48 @@ def _split(documents: List[Document], chunk_size: int, chunk_overlap: int, chunk
     return out
 
 def split_into_section_chunks(documents: List[Document]) -> List[Document]:
-    return _split(documents, 1000, 200, "section")
+    return _split(documents, SECTION_CHUNK_SIZE, SECTION_CHUNK_OVERLAP, "section")
 
 def split_into_citation_chunks(documents: List[Document]) -> List[Document]:
-    return _split(documents, 400, 50, "citation")
+    return _split(documents, CITATION_CHUNK_SIZE, CITATION_CHUNK_OVERLAP, "citation")
+
+def _split_with_offsets(splitter: "RecursiveCharacterTextSplitter", text: str, overlap: int) -> Iterator[Tuple[str, int]]:
+    index, prev_len = 0, 0
+    for chunk in splitter.split_text(text):
+        index = text.find(chunk, max(0, index + prev_len - overlap))
+        prev_len = len(chunk)
+        yield chunk, index
+
+def _best_section(sections: List[Tuple[str, int]], first: int, start: int, end: int) -> int:
+    # Index of the section (from `first` on) sharing the most characters with [start, end).
+    best, best_overlap, i = first, -1, first
+    while i < len(sections) and sections[i][1] < end:
+        overlap = min(end, sections[i][1] + len(sections[i][0])) - max(start, sections[i][1])
+        if overlap > best_overlap:
+            best, best_overlap = i, overlap
+        i += 1
+    return best
+
+def split_into_hierarchical_chunks(documents: List[Document]) -> List[Tuple[Document, List[Document]]]:
+    # Sections and citations are both split once from the raw text; each citation is attached to the section it
+    # overlaps most, so citations inside a section overlap are not produced twice (same set as a flat citation split).
+    # char_start/char_end are offsets into the source page; the caller links children via parent_id.
+    section_splitter = _splitter(SECTION_CHUNK_SIZE, SECTION_CHUNK_OVERLAP)
+    citation_splitter = _splitter(CITATION_CHUNK_SIZE, CITATION_CHUNK_OVERLAP)
+    out = []
+    for doc in documents:
+        sections = list(_split_with_offsets(section_splitter, doc.page_content, SECTION_CHUNK_OVERLAP))
+        if not sections:
+            continue
+        children: List[List[Document]] = [[] for _ in sections]
+        first = 0
+        for cit_text, cit_start in _split_with_offsets(citation_splitter, doc.page_content, CITATION_CHUNK_OVERLAP):
+            while first < len(sections) - 1 and sections[first][1] + len(sections[first][0]) <= cit_start:
+                first += 1
+            cit_end = cit_start + len(cit_text)
+            children[_best_section(sections, first, cit_start, cit_end)].append(
+                Document(page_content=cit_text, metadata={**doc.metadata, "chunk_type": "citation", "char_start": cit_start, "char_end": cit_end}))
+        for (sec_text, sec_start), sec_children in zip(sections, children):
+            section = Document(page_content=sec_text, metadata={**doc.metadata, "chunk_type": "section", "char_start": sec_start, "char_end": sec_start + len(sec_text)})
+            out.append((section, sec_children))
+    return out
@@ -0,0 +1,36 @@
+import logging
+import threading
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_CHARS_PER_TOKEN = 4  # estimate when the tokenizer is unavailable
+_encoding = None
+_encoding_lock = threading.Lock()
+
+def _get_encoding():
+    # tiktoken downloads its BPE file on first use; without network access counts fall back to an estimate.
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                import tiktoken
+                try:
+                    _encoding = tiktoken.encoding_for_model(settings.LLM_MODEL)
+                except KeyError:
+                    _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                logger.warning("Tokenizer for %s unavailable (%s); estimating %d chars per token", settings.LLM_MODEL, e, _CHARS_PER_TOKEN)
+                _encoding = False
+        return _encoding
+
+def count_tokens(text: str) -> int:
+    enc = _get_encoding()
+    return len(enc.encode(text, disallowed_special=())) if enc else -(-len(text) // _CHARS_PER_TOKEN)
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    enc = _get_encoding()
+    if not enc:
+        return text[:max_tokens * _CHARS_PER_TOKEN]
+    tokens = enc.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else enc.decode(tokens[:max_tokens])
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tarfile
+import uuid
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from src.core.config import settings
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_FORM_OVERHEAD = 64 * 1024  # multipart boundaries, part headers and small form fields around the file
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz")
+
+class UploadTooLargeError(ValueError):
+    pass
+
+class UploadSizeLimitMiddleware:
+    """Caps the request body of upload routes before the multipart form is parsed (and spooled to disk):
+    a declared Content-Length over the limit is rejected with 413 without reading the body, and chunked bodies
+    are counted as they arrive and cut off as soon as they cross it."""
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app, self.limits = app, limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+        detail = f"Request body exceeds maximum upload size of {limit} bytes"
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > limit:
+            return await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=detail)  # raised inside form parsing, answered by FastAPI
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+def sanitize_filename(filename: str) -> str:
+    name = Path(filename).name.replace("/", "").replace("\\", "").replace("..", "")[:255]
+    if not name.strip():
+        raise ValueError("Invalid filename")
+    return name
+
+async def save_upload_stream(file: UploadFile, max_size: Optional[int] = None) -> str:
+    # Copies the upload to a unique spool path in fixed-size chunks without blocking the event loop.
+    limit = settings.MAX_UPLOAD_SIZE if max_size is None else max_size
+    if file.size is not None and file.size > limit:
+        raise UploadTooLargeError(f"File exceeds maximum upload size of {limit} bytes")
+    name = sanitize_filename(file.filename or "")
+    await aiofiles.os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4().hex}_{name}")
+    written = 0
+    try:
+        async with aiofiles.open(path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                written += len(chunk)
+                if written > limit:
+                    raise UploadTooLargeError(f"File exceeds maximum upload size of {limit} bytes")
+                await out.write(chunk)
+    except BaseException:
+        if await aiofiles.os.path.exists(path):
+            await aiofiles.os.remove(path)
+        raise
+    finally:
+        await file.close()
+    return path
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+def _archive_members(path: str, filename: str):
+    # (member name, size, open()) for regular files; directories and links are skipped.
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    yield info.filename, info.file_size, lambda info=info: zf.open(info)
+        return
+    with tarfile.open(path) as tf:
+        for info in tf:
+            if info.isfile():
+                yield info.name, info.size, lambda info=info: tf.extractfile(info)
+
+def expand_archive(path: str, filename: str, dest_dir: str, max_files: int, max_size: int) -> List[Tuple[str, str]]:
+    # Extracts a zip/tar upload under dest_dir with flattened, sanitised names. Returns (file_path, filename) pairs.
+    # Sizes are counted while copying, so a member that understates its size cannot exceed max_size either.
+    files: List[Tuple[str, str]] = []
+    written = 0
+    os.makedirs(dest_dir, exist_ok=True)
+    try:
+        for name, size, open_member in _archive_members(path, filename):
+            base = Path(name).name
+            if not base or base.startswith((".", "~$")) or "__MACOSX" in Path(name).parts:
+                continue
+            if len(files) >= max_files:
+                raise ValueError(f"Archive has more than {max_files} files")
+            if written + size > max_size:
+                raise UploadTooLargeError(f"Archive expands beyond {max_size} bytes")
+            out_path = os.path.join(dest_dir, f"{uuid.uuid4().hex}_{sanitize_filename(base)}")
+            with open_member() as src, open(out_path, "wb") as out:
+                while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                    written += len(chunk)
+                    if written > max_size:
+                        raise UploadTooLargeError(f"Archive expands beyond {max_size} bytes")
+                    out.write(chunk)
+            files.append((out_path, sanitize_filename(base)))
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        shutil.rmtree(dest_dir, ignore_errors=True)
+        reason = str(e).splitlines()[0].rstrip(":")
+        raise ValueError(f"Unreadable archive {filename}: {reason}")
+    except BaseException:
+        shutil.rmtree(dest_dir, ignore_errors=True)
+        raise
+    return files
@@ -0,0 +1,3 @@
+from src.workers.queue import enqueue_request
+from src.workers.runner import Worker
+__all__ = ["enqueue_request", "Worker"]
@@ -0,0 +1,58 @@
+import asyncio
+import contextlib
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Set
+import psycopg
+from src.core.database import engine
+from src.utils.aio import loop_local
+from src.workers.queue import REQUEST_EVENTS_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+class RequestEventListener:
+    """One LISTEN connection per event loop, fanning request events out to in-process subscribers."""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._task = None
+        self._ready = asyncio.Event()
+
+    async def _listen(self):
+        dsn = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {REQUEST_EVENTS_CHANNEL}")
+                    self._ready.set()
+                    async for note in conn.notifies():
+                        event = json.loads(note.payload)
+                        for queue in self._subscribers.get(event["request_id"], ()):
+                            queue.put_nowait(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._ready.clear()
+                # Events sent while reconnecting are lost; subscribers re-read the row on their keepalive timeout.
+                logger.exception("Request event listener failed; reconnecting")
+                await asyncio.sleep(1)
+
+    @asynccontextmanager
+    async def subscribe(self, request_id: int) -> AsyncIterator[asyncio.Queue]:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._listen())
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(request_id, set()).add(queue)
+        try:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._ready.wait(), 5)  # LISTEN before the caller reads the current state
+            yield queue
+        finally:
+            subs = self._subscribers.get(request_id)
+            subs.discard(queue)
+            if not subs:
+                self._subscribers.pop(request_id, None)
+
+def get_request_event_listener() -> RequestEventListener:
+    return loop_local("request_events", RequestEventListener)
@@ -0,0 +1,96 @@
+import json
+from datetime import timedelta
+from typing import List, Optional
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+from src.core.database import SessionLocal
+from src.models.db_models import Project, ProjectStatusEnum, Request, RequestStatusEnum, RequestTypeEnum
+from src.utils.metrics import Gauge
+
+# LISTEN/NOTIFY channel for progress and status changes, so event streams do not poll the requests table.
+REQUEST_EVENTS_CHANNEL = "request_events"
+
+def enqueue_request(db: Session, type: RequestTypeEnum, payload: dict, entity_id: Optional[str] = None) -> Request:
+    req = Request(type=type, status=RequestStatusEnum.PENDING, entity_id=entity_id, payload=json.dumps(payload))
+    db.add(req)
+    db.commit()
+    db.refresh(req)
+    return req
+
+def _notify(db: Session, request_id: int, event: str, data: dict):
+    # Delivered when the surrounding transaction commits.
+    db.execute(select(func.pg_notify(REQUEST_EVENTS_CHANNEL, json.dumps({"request_id": request_id, "event": event, "data": data}, separators=(",", ":")))))
+
+def claim_request(db: Session, types: List[RequestTypeEnum], worker_id: str) -> Optional[Request]:
+    # SKIP LOCKED lets any number of workers poll the same table without handing out a job twice.
+    req = db.query(Request).filter(Request.status == RequestStatusEnum.PENDING, Request.type.in_(types)).order_by(Request.id).with_for_update(skip_locked=True).limit(1).first()
+    if not req:
+        db.rollback()
+        return None
+    req.status = RequestStatusEnum.RUNNING
+    req.worker_id = worker_id
+    req.attempts = (req.attempts or 0) + 1
+    req.started_at = req.heartbeat_at = func.now()
+    _notify(db, req.id, "status", {"status": RequestStatusEnum.RUNNING.value})
+    db.commit()
+    db.refresh(req)
+    return req
+
+def _owned(request_id: int, worker_id: str):
+    return (Request.id == request_id, Request.worker_id == worker_id, Request.status == RequestStatusEnum.RUNNING)
+
+def report_progress(db: Session, request_id: int, worker_id: str, progress: dict) -> bool:
+    n = db.query(Request).filter(*_owned(request_id, worker_id)).update({Request.progress: json.dumps(progress, separators=(",", ":"))}, synchronize_session=False)
+    if n:
+        _notify(db, request_id, "progress", progress)
+    db.commit()
+    return n > 0
+
+def heartbeat_requests(db: Session, request_ids: List[int], worker_id: str) -> None:
+    if not request_ids:
+        return
+    db.query(Request).filter(Request.id.in_(request_ids), Request.worker_id == worker_id, Request.status == RequestStatusEnum.RUNNING).update({Request.heartbeat_at: func.now()}, synchronize_session=False)
+    db.commit()
+
+def complete_request(db: Session, request_id: int, worker_id: str, entity_id: Optional[str], result: dict) -> bool:
+    n = db.query(Request).filter(*_owned(request_id, worker_id)).update({Request.status: RequestStatusEnum.COMPLETED, Request.entity_id: entity_id, Request.result_payload: json.dumps(result, separators=(",", ":")), Request.error_message: None}, synchronize_session=False)
+    if n:
+        _notify(db, request_id, "status", {"status": RequestStatusEnum.COMPLETED.value})
+    db.commit()
+    return n > 0
+
+def fail_request(db: Session, request_id: int, worker_id: str, error: str) -> bool:
+    n = db.query(Request).filter(*_owned(request_id, worker_id)).update({Request.status: RequestStatusEnum.FAILED, Request.error_message: error}, synchronize_session=False)
+    if n:
+        _notify(db, request_id, "status", {"status": RequestStatusEnum.FAILED.value})
+    db.commit()
+    return n > 0
+
+def queue_depth(db: Session) -> dict:
+    # {(type, status): count} over PENDING and RUNNING jobs; every combination is present, zeros included.
+    open_statuses = (RequestStatusEnum.PENDING, RequestStatusEnum.RUNNING)
+    counts = {(t, s): n for t, s, n in db.query(Request.type, Request.status, func.count(Request.id)).filter(Request.status.in_(open_statuses)).group_by(Request.type, Request.status)}
+    return {(t, s): counts.get((t, s), 0) for t in RequestTypeEnum for s in open_statuses}
+
+def _collect_queue_depth():
+    with SessionLocal() as db:
+        return [((t.value, s.value), n) for (t, s), n in queue_depth(db).items()]
+
+Gauge("dd_requests", "Queued (PENDING) and running (RUNNING) jobs in the requests table, by type.", _collect_queue_depth, ("type", "status"))
+
+def requeue_stale_requests(db: Session, stale_after_seconds: float, max_attempts: int) -> int:
+    # RUNNING jobs whose worker stopped heartbeating go back to PENDING; jobs with no stored payload
+    # (enqueued before the queue existed) or out of attempts are failed instead. Both send the status event
+    # a worker would, and failed generation jobs release their project like a failing task does.
+    stale = (Request.status == RequestStatusEnum.RUNNING, func.coalesce(Request.heartbeat_at, Request.created_at) < func.now() - timedelta(seconds=stale_after_seconds))
+    failed = db.execute(update(Request).where(*stale, or_(Request.payload.is_(None), Request.attempts >= max_attempts)).values(status=RequestStatusEnum.FAILED, error_message="Worker stopped responding").returning(Request.id, Request.type, Request.entity_id)).all()
+    for request_id, _, _ in failed:
+        _notify(db, request_id, "status", {"status": RequestStatusEnum.FAILED.value})
+    project_ids = [int(e) for _, t, e in failed if t == RequestTypeEnum.generate_answers and e and e.isdigit()]
+    if project_ids:
+        db.query(Project).filter(Project.id.in_(project_ids), Project.status == ProjectStatusEnum.GENERATING).update({Project.status: ProjectStatusEnum.OUTDATED}, synchronize_session=False)
+    requeued = db.execute(update(Request).where(*stale).values(status=RequestStatusEnum.PENDING, worker_id=None).returning(Request.id)).scalars().all()
+    for request_id in requeued:
+        _notify(db, request_id, "status", {"status": RequestStatusEnum.PENDING.value})
+    db.commit()
+    return len(requeued)
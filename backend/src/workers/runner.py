@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from src.core.config import settings
+from src.core.database import SessionLocal
+from src.models.db_models import RequestTypeEnum
+from src.workers.queue import claim_request, complete_request, fail_request, heartbeat_requests, report_progress, requeue_stale_requests
+from src.workers.tasks import TASK_HANDLERS
+
+logger = logging.getLogger(__name__)
+
+class Worker:
+    """Claims PENDING requests from the requests table and runs them, at most `concurrency[type]` at a time per type."""
+
+    def __init__(self, concurrency: Optional[Dict[str, int]] = None, worker_id: Optional[str] = None):
+        limits = concurrency if concurrency is not None else settings.WORKER_CONCURRENCY
+        self.concurrency = {RequestTypeEnum(t): n for t, n in limits.items() if n > 0}
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: Dict[int, RequestTypeEnum] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, sum(self.concurrency.values())), thread_name_prefix="job")
+        self._thread: Optional[threading.Thread] = None
+
+    def _free_types(self):
+        with self._lock:
+            busy = Counter(self._running.values())
+        return [t for t, limit in self.concurrency.items() if busy[t] < limit]
+
+    def _claim_next(self) -> bool:
+        types = self._free_types()
+        if not types:
+            return False
+        db = SessionLocal()
+        try:
+            req = claim_request(db, types, self.worker_id)
+        finally:
+            db.close()
+        if not req:
+            return False
+        with self._lock:
+            self._running[req.id] = req.type
+        self._pool.submit(self._execute, req.id, req.type, req.payload)
+        return True
+
+    def _reporter(self, request_id: int):
+        # Progress goes through its own session so it never commits the handler's unfinished work.
+        def report(progress: dict):
+            db = SessionLocal()
+            try:
+                report_progress(db, request_id, self.worker_id, progress)
+            except Exception:
+                logger.exception("Progress update for request %s failed", request_id)
+            finally:
+                db.close()
+        return report
+
+    def _execute(self, request_id: int, type: RequestTypeEnum, payload: Optional[str]):
+        db = SessionLocal()
+        try:
+            entity_id, result = TASK_HANDLERS[type](db, json.loads(payload or "{}"), self._reporter(request_id))
+            complete_request(db, request_id, self.worker_id, entity_id, result)
+        except Exception as e:
+            logger.exception("Request %s (%s) failed", request_id, type.value)
+            db.rollback()
+            fail_request(db, request_id, self.worker_id, str(e))
+        finally:
+            db.close()
+            with self._lock:
+                self._running.pop(request_id, None)
+
+    def _maintain(self, requeue_stale: bool = True):
+        with self._lock:
+            running = list(self._running)
+        db = SessionLocal()
+        try:
+            heartbeat_requests(db, running, self.worker_id)
+            if requeue_stale:
+                requeued = requeue_stale_requests(db, settings.WORKER_STALE_SECONDS, settings.WORKER_MAX_ATTEMPTS)
+                if requeued:
+                    logger.warning("Re-queued %d stale request(s)", requeued)
+        finally:
+            db.close()
+
+    def _drain(self):
+        # Keep heartbeating in-flight jobs after stop() so other workers do not re-claim them.
+        last_beat = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._running:
+                    break
+            if time.monotonic() - last_beat >= settings.WORKER_HEARTBEAT_SECONDS:
+                try:
+                    self._maintain(requeue_stale=False)
+                except Exception:
+                    logger.exception("Heartbeat failed while draining")
+                last_beat = time.monotonic()
+            time.sleep(0.5)
+        self._pool.shutdown(wait=True)
+
+    def run_forever(self):
+        logger.info("Worker %s started with limits %s", self.worker_id, {t.value: n for t, n in self.concurrency.items()})
+        last_maintenance = 0.0
+        while not self._stop.is_set():
+            try:
+                if time.monotonic() - last_maintenance >= settings.WORKER_HEARTBEAT_SECONDS:
+                    self._maintain()
+                    last_maintenance = time.monotonic()
+                if self._claim_next():
+                    continue
+            except Exception:
+                logger.exception("Worker loop error")
+            self._stop.wait(settings.WORKER_POLL_SECONDS)
+        self._drain()
+
+    def start(self) -> threading.Thread:
+        self._thread = threading.Thread(target=self.run_forever, name="job-worker", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
@@ -0,0 +1,127 @@
+import os
+import shutil
+import uuid
+from typing import Callable, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from src.core.config import settings
+from src.core.database import AsyncSessionLocal
+from src.models.db_models import Project, ProjectStatusEnum, RequestTypeEnum
+from src.services.answer_service import agenerate_answers_for_project, generate_answers_for_project
+from src.services.ingestion_service import BulkFile, mark_all_docs_projects_outdated, run_bulk_indexing, run_indexing_and_registry
+from src.services.project_service import create_project_from_parsed
+from src.services.questionnaire_parser import parse_questionnaire_pages
+from src.utils.aio import run_coroutine_sync
+from src.utils.loaders import get_file_type, load_documents_from_file_sync
+from src.utils.uploads import expand_archive, is_archive
+
+# Each handler gets a progress callback and returns (entity_id, result payload); raising marks the request FAILED.
+TaskResult = Tuple[Optional[str], dict]
+ProgressFn = Callable[[dict], None]
+
+def _remove_upload(file_path: str):
+    try:
+        if os.path.isfile(file_path):
+            os.remove(file_path)
+    except Exception:
+        pass
+
+def index_document_task(db: Session, payload: dict, report: ProgressFn) -> TaskResult:
+    try:
+        doc_id, sec, cit = run_indexing_and_registry(db, payload["file_path"], payload["filename"], payload.get("document_id"))
+    finally:
+        _remove_upload(payload["file_path"])
+    return doc_id, {"document_id": doc_id, "section_count": sec, "citation_count": cit}
+
+def index_documents_task(db: Session, payload: dict, report: ProgressFn) -> TaskResult:
+    # Archives are expanded here rather than in the upload request; an unreadable archive only fails its own entry.
+    files, rejected, archive_dirs = [], [], []
+    try:
+        for entry in payload["files"]:
+            if not is_archive(entry["filename"]):
+                files.append((entry["file_path"], entry["filename"]))
+                continue
+            archive_dirs.append(os.path.join(settings.UPLOAD_DIR, f"bulk_{uuid.uuid4().hex}"))
+            try:
+                files += expand_archive(entry["file_path"], entry["filename"], archive_dirs[-1], settings.BULK_INGEST_MAX_FILES, settings.BULK_INGEST_MAX_EXTRACTED_SIZE)
+            except ValueError as e:
+                rejected.append(BulkFile(entry["file_path"], entry["filename"], status="failed", error=str(e)).summary())
+            finally:
+                _remove_upload(entry["file_path"])
+        if len(files) > settings.BULK_INGEST_MAX_FILES:
+            raise ValueError(f"Bulk request has {len(files)} files; the limit is {settings.BULK_INGEST_MAX_FILES}")
+        jobs, changed = run_bulk_indexing(files, lambda p: report({**p, "total": p["total"] + len(rejected), "failed": p["failed"] + len(rejected), "files": rejected + p["files"]}))
+    finally:
+        for path, _ in files:
+            _remove_upload(path)
+        for d in archive_dirs:
+            shutil.rmtree(d, ignore_errors=True)
+    if changed:
+        # Once for the whole batch instead of once per document.
+        mark_all_docs_projects_outdated(db, *changed)
+    documents = rejected + [f.summary() for f in jobs]
+    counts = {s: sum(d["status"] == s for d in documents) for s in ("indexed", "unchanged", "failed")}
+    if documents and counts["failed"] == len(documents):
+        raise RuntimeError(f"Indexing failed for all {len(documents)} file(s); first error: {documents[0]['error']}")
+    return None, {"total": len(documents), **counts, "documents": documents}
+
+def create_project_task(db: Session, payload: dict, report: ProgressFn) -> TaskResult:
+    file_path, filename = payload["file_path"], payload["filename"]
+    try:
+        # Loaded once: the same page documents feed the question parser and the chunk indexer.
+        pages = load_documents_from_file_sync(file_path, get_file_type(filename))
+        parsed = parse_questionnaire_pages(pages)
+        doc_id, _, _ = run_indexing_and_registry(db, file_path, filename, None, raw_docs=pages)
+        del pages
+        project = create_project_from_parsed(db, name=payload["name"], parsed=parsed, questionnaire_document_id=doc_id, scope="ALL_DOCS")
+    finally:
+        _remove_upload(file_path)
+    return str(project.id), {"project_id": project.id}
+
+def update_project_task(db: Session, payload: dict, report: ProgressFn) -> TaskResult:
+    project_id = payload["project_id"]
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise ValueError("Project not found")
+    if payload.get("name") is not None:
+        project.name = payload["name"]
+    if payload.get("scope") is not None:
+        project.scope = payload["scope"]
+    db.commit()
+    return str(project_id), {"project_id": project_id}
+
+async def _agenerate_answers(project_id: int, concurrency: Optional[int], batch_size: Optional[int], report: ProgressFn) -> dict:
+    async with AsyncSessionLocal() as adb:
+        return await agenerate_answers_for_project(adb, project_id, concurrency=concurrency, on_progress=report, batch_size=batch_size)
+
+def generate_answers_task(db: Session, payload: dict, report: ProgressFn) -> TaskResult:
+    project_id = payload["project_id"]
+    try:
+        proj = db.query(Project).filter(Project.id == project_id).first()
+        if proj:
+            proj.status = ProjectStatusEnum.GENERATING
+            db.commit()
+        if settings.ASYNC_GENERATION:
+            progress = run_coroutine_sync(_agenerate_answers(project_id, payload.get("concurrency"), payload.get("batch_size"), report))
+        else:
+            progress = generate_answers_for_project(db, project_id, concurrency=payload.get("concurrency"), on_progress=report, batch_size=payload.get("batch_size"))
+        proj = db.query(Project).filter(Project.id == project_id).first()
+        if proj:
+            # Questions that failed have no answer yet, so the project still needs a re-run.
+            proj.status = ProjectStatusEnum.OUTDATED if progress["failed"] else ProjectStatusEnum.COMPLETE
+            db.commit()
+    except Exception:
+        db.rollback()
+        proj = db.query(Project).filter(Project.id == project_id).first()
+        if proj:
+            proj.status = ProjectStatusEnum.OUTDATED
+            db.commit()
+        raise
+    return str(project_id), {"project_id": project_id, **progress}
+
+TASK_HANDLERS: Dict[RequestTypeEnum, Callable[[Session, dict, ProgressFn], TaskResult]] = {
+    RequestTypeEnum.index_document: index_document_task,
+    RequestTypeEnum.index_documents: index_documents_task,
+    RequestTypeEnum.create_project: create_project_task,
+    RequestTypeEnum.update_project: update_project_task,
+    RequestTypeEnum.generate_answers: generate_answers_task,
+}
@@ -0,0 +1,26 @@
+import json
+import pytest
+from src.services.answer_service import _AnswerFieldStream
+
+def _stream(chunks):
+    decoder = _AnswerFieldStream()
+    return "".join(decoder.feed(c) for c in chunks)
+
+@pytest.mark.parametrize("answer", ["plain", "line\nbreak \"quoted\" \\ tab\t", "café — \U0001F600 and \U0001D11E"])
+def test_streamed_answer_matches_parsed_answer_at_every_split(answer):
+    raw = json.dumps({"answer": answer, "answerable": True})  # ensure_ascii: non-BMP characters become surrogate-pair escapes
+    for cut in range(len(raw) + 1):
+        assert _stream([raw[:cut], raw[cut:]]) == json.loads(raw)["answer"]
+
+def test_surrogate_pair_split_between_escapes():
+    streamed = _stream(['{"answer": "a \\ud83d', '\\ude00 b"}'])
+    assert streamed == "a \U0001F600 b"
+    streamed.encode("utf-8")
+
+def test_token_by_token():
+    raw = json.dumps({"answer": "\U0001F600\U0001F601x"})
+    assert _stream(list(raw)) == "\U0001F600\U0001F601x"
+
+def test_lone_high_surrogate_is_kept_like_json():
+    raw = '{"answer": "a\\ud83db"}'
+    assert _stream([raw[:18], raw[18:]]) == json.loads(raw)["answer"]
@@ -0,0 +1,14 @@
+from pathlib import Path
+import pytest
+from src.utils.loaders import _load_file, _load_pdf_pages
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
+def test_sharded_pdf_matches_serial_load():
+    pytest.importorskip("pymupdf4llm")
+    path = str(DATA_DIR / "20260110_MiniMax_Accountants_Report.pdf")  # PDF 1.6; a re-serialised shard reports 1.7
+    serial = _load_file(path, "pdf")
+    total, shard = len(serial), 8
+    sharded = [d for start in range(0, total, shard) for d in _load_pdf_pages(path, start, min(start + shard, total))]
+    assert [d.page_content for d in sharded] == [d.page_content for d in serial]
+    assert [d.metadata for d in sharded] == [d.metadata for d in serial]
@@ -0,0 +1,37 @@
+"""Questionnaire Agent job worker: python worker.py"""
+import sys
+from pathlib import Path
+backend_dir = Path(__file__).resolve().parent
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+import logging
+import signal
+from src.core.config import settings
+from src.core.database import init_db
+from src.core.warmup import warm_up
+from src.storage.vector_store import get_vector_store_service
+from src.utils.aio import run_coroutine_sync
+from src.utils.loaders import shutdown_loader_pool
+from src.utils.metrics import serve_metrics
+from src.workers.runner import Worker
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    init_db()
+    get_vector_store_service().ensure_indexes()
+    if settings.STARTUP_WARMUP:
+        # On the job loop, so async generation (if enabled) finds its pool ready.
+        run_coroutine_sync(warm_up(async_db=settings.ASYNC_GENERATION))
+    if settings.WORKER_METRICS_PORT:
+        serve_metrics(settings.WORKER_METRICS_PORT)
+    worker = Worker()
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    try:
+        worker.run_forever()
+    finally:
+        shutdown_loader_pool()
+
+if __name__ == "__main__":
+    main()
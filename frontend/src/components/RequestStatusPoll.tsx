@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
-import { getRequest } from "../services/api";
-import type { RequestStatus } from "../types";
+import { getRequest, requestEvents } from "../services/api";
+import type { RequestInfo, RequestProgress, RequestStatus } from "../types";
 
 interface Props {
   requestId: number;
@@ -10,38 +10,73 @@ interface Props {
 
 export default function RequestStatusPoll({ requestId, onComplete, onCancel }: Props) {
   const [status, setStatus] = useState<RequestStatus | null>(null);
+  const [progress, setProgress] = useState<RequestProgress | null>(null);
   const [errorMessage, setErrorMessage] = useState<string | null>(null);
 
   useEffect(() => {
     let cancelled = false;
+    let source: EventSource | null = null;
+    const apply = (req: RequestInfo) => {
+      setStatus(req.status);
+      setErrorMessage(req.error_message ?? null);
+      if (req.progress) setProgress(JSON.parse(req.progress));
+      if (req.status === "COMPLETED") {
+        onComplete(req.entity_id ?? null);
+        return true;
+      }
+      if (req.status === "FAILED") {
+        onComplete(null);
+        return true;
+      }
+      return false;
+    };
     const poll = async () => {
       try {
         const req = await getRequest(requestId);
-        if (cancelled) return;
-        setStatus(req.status);
-        setErrorMessage(req.error_message ?? null);
-        if (req.status === "COMPLETED") {
-          onComplete(req.entity_id ?? null);
-          return;
-        }
-        if (req.status === "FAILED") {
-          onComplete(null);
-          return;
-        }
+        if (cancelled || apply(req)) return;
         setTimeout(poll, 2000);
       } catch (e) {
         if (!cancelled) setErrorMessage(String(e));
       }
     };
-    poll();
+    if (typeof EventSource === "undefined") {
+      poll();
+    } else {
+      source = requestEvents(requestId);
+      source.addEventListener("status", (e) => {
+        if (!cancelled && apply(JSON.parse((e as MessageEvent).data))) source?.close();
+      });
+      source.addEventListener("progress", (e) => {
+        if (!cancelled) setProgress(JSON.parse((e as MessageEvent).data));
+      });
+      source.onerror = () => {
+        source?.close();
+        if (!cancelled) poll();
+      };
+    }
     return () => {
       cancelled = true;
+      source?.close();
     };
   }, [requestId, onComplete]);
 
   return (
     <div>
-      <p>Request #{requestId}: {status ?? "…"}</p>
+      <p>
+        Request #{requestId}: {status ?? "…"}
+        {progress && ` (${progress.done}/${progress.total} done${progress.failed ? `, ${progress.failed} failed` : ""})`}
+      </p>
+      {progress?.files?.some((f) => f.status === "failed") && (
+        <ul>
+          {progress.files
+            .filter((f) => f.status === "failed")
+            .map((f, i) => (
+              <li key={i} className="error">
+                {f.filename}: {f.error}
+              </li>
+            ))}
+        </ul>
+      )}
       {errorMessage && <p className="error">{errorMessage}</p>}
       {onCancel && (
         <button type="button" onClick={onCancel}>
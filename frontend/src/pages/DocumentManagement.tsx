@@ -1,6 +1,6 @@
 import { useState } from "react";
 import { useQuery, useMutation, useQueryClient } from "@tanstack/react-query";
-import { listDocuments, indexDocumentAsync } from "../services/api";
+import { listDocuments, indexDocumentAsync, bulkIndexDocumentsAsync } from "../services/api";
 import RequestStatusPoll from "../components/RequestStatusPoll";
 
 export default function DocumentManagement() {
@@ -13,7 +13,11 @@ export default function DocumentManagement() {
   });
 
   const indexMutation = useMutation({
-    mutationFn: (file: File) => indexDocumentAsync(file),
+    // Several files or an archive go through the bulk endpoint as one request.
+    mutationFn: (files: File[]) =>
+      files.length === 1 && !/\.(zip|tar|tgz|tar\.gz)$/i.test(files[0].name)
+        ? indexDocumentAsync(files[0])
+        : bulkIndexDocumentsAsync(files),
     onSuccess: (data) => setRequestId(data.id),
   });
 
@@ -23,8 +27,8 @@ export default function DocumentManagement() {
   };
 
   const handleUpload = (e: React.ChangeEvent<HTMLInputElement>) => {
-    const file = e.target.files?.[0];
-    if (file) indexMutation.mutate(file);
+    const files = Array.from(e.target.files ?? []);
+    if (files.length) indexMutation.mutate(files);
     e.target.value = "";
   };
 
@@ -34,7 +38,7 @@ export default function DocumentManagement() {
   return (
     <section>
       <h2>Document management</h2>
-      <p>Upload PDFs to index for RAG. Indexed documents appear below.</p>
+      <p>Upload PDFs (several at once, or a .zip/.tar archive) to index for RAG. Indexed documents appear below.</p>
       {requestId ? (
         <RequestStatusPoll
           requestId={requestId}
@@ -44,10 +48,11 @@ export default function DocumentManagement() {
       ) : (
         <p>
           <label>
-            Upload file:{" "}
+            Upload files:{" "}
             <input
               type="file"
-              accept=".pdf,.docx,.txt"
+              multiple
+              accept=".pdf,.docx,.txt,.zip,.tar,.tgz,.gz"
               onChange={handleUpload}
               disabled={indexMutation.isPending}
             />
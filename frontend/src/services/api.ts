@@ -47,6 +47,10 @@ export async function getRequest(requestId: number): Promise<RequestInfo> {
   return fetchApi(`/api/requests/${requestId}`);
 }
 
+export function requestEvents(requestId: number): EventSource {
+  return new EventSource(`${API_BASE}/api/requests/${requestId}/events`);
+}
+
 export async function listProjects(): Promise<ProjectListItem[]> {
   return fetchApi("/api/projects/list");
 }
@@ -87,6 +91,15 @@ export async function indexDocumentAsync(file: File): Promise<RequestInfo> {
   return res.json() as Promise<RequestInfo>;
 }
 
+export async function bulkIndexDocumentsAsync(files: File[]): Promise<RequestInfo> {
+  const form = new FormData();
+  for (const file of files) form.append("files", file);
+  const url = `${API_BASE}/api/documents/bulk-index-async`;
+  const res = await fetch(url, { method: "POST", body: form });
+  if (!res.ok) throw new Error(await res.text() || `HTTP ${res.status}`);
+  return res.json() as Promise<RequestInfo>;
+}
+
 export async function getAnswersByProject(
   projectId: number
 ): Promise<AnswerInfo[]> {
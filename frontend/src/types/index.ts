@@ -17,6 +17,7 @@ export type RequestType =
   | "create_project"
   | "update_project"
   | "index_document"
+  | "index_documents"
   | "generate_answers";
 
 export type RequestStatus = "PENDING" | "RUNNING" | "COMPLETED" | "FAILED";
@@ -38,13 +39,32 @@ export interface RequestInfo {
   entity_id: string | null;
   result_payload: string | null;
   error_message: string | null;
+  progress: string | null;
   created_at: string;
 }
 
+export interface BulkFileStatus {
+  filename: string;
+  status: "queued" | "loading" | "splitting" | "embedding" | "storing" | "indexed" | "unchanged" | "failed";
+  document_id: string | null;
+  section_count: number;
+  citation_count: number;
+  error: string | null;
+}
+
+export interface RequestProgress {
+  total: number;
+  done: number;
+  failed: number;
+  question_id?: number;
+  files?: BulkFileStatus[];
+}
+
 export interface DocumentRegistryItem {
   id: number;
   document_id: string;
   filename: string;
+  content_hash: string | null;
   indexed_at: string;
   chunk_count_section: number;
   chunk_count_citation: number;
@@ -89,6 +109,7 @@ export interface AnswerInfo {
   ai_answer_text: string | null;
   manual_answer_text: string | null;
   human_answer_text: string | null;
+  reused_from_answer_id: number | null;
   created_at: string;
   updated_at: string;
   citations: Citation[];
@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+# Offline pipeline benchmark with local model stand-ins (from project root). Needs BENCHMARK_DATABASE_URL.
+set -e
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
+cd "$PROJECT_ROOT/backend"
+"$PROJECT_ROOT/venv/bin/python" -m benchmarks.run --data-dir "$PROJECT_ROOT/data" "$@"
@@ -0,0 +1,7 @@
+#!/usr/bin/env bash
+# Start a standalone job worker (from project root).
+set -e
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+PROJECT_ROOT="$(cd "$SCRIPT_DIR/.." && pwd)"
+cd "$PROJECT_ROOT/backend"
+"$PROJECT_ROOT/venv/bin/python" worker.py "$@"
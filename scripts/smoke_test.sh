@@ -53,15 +53,25 @@ echo "   Project ID: $PROJECT_ID"
 echo "3. Generating all answers..."
 R3=$(curl -s -X POST "$API/api/answers/generate-all-async?project_id=$PROJECT_ID")
 REQ_ID3=$(echo "$R3" | python3 -c "import sys,json; print(json.load(sys.stdin).get('id',''))" 2>/dev/null || true)
-for i in $(seq 1 40); do
-  PAYLOAD=$(curl -s "$API/api/requests/$REQ_ID3")
-  ST=$(echo "$PAYLOAD" | python3 -c "import sys,json; print(json.load(sys.stdin).get('status',''))" 2>/dev/null || true)
-  ERR=$(echo "$PAYLOAD" | python3 -c "import sys,json; print(json.load(sys.stdin).get('error_message','') or '')" 2>/dev/null || true)
-  echo "   Status: $ST"
-  [ "$ST" = "COMPLETED" ] && break
-  if [ "$ST" = "FAILED" ]; then echo "Generate answers failed: $ERR"; exit 1; fi
-  sleep 5
-done
+# Follow the request's event stream instead of polling; it ends with the final status event.
+ST=$(curl -sN --max-time 600 "$API/api/requests/$REQ_ID3/events" | python3 -c "
+import sys, json
+event, status = None, ''
+for line in sys.stdin:
+    line = line.strip()
+    if line.startswith('event:'):
+        event = line[6:].strip()
+    elif line.startswith('data:'):
+        data = json.loads(line[5:])
+        if event == 'progress':
+            print(f\"   Progress: {data['done']}/{data['total']} done, {data['failed']} failed\", file=sys.stderr)
+        elif event == 'status':
+            status = data.get('status', '')
+            print(f'   Status: {status}', file=sys.stderr)
+            if status == 'FAILED':
+                print(f\"Generate answers failed: {data.get('error_message')}\", file=sys.stderr)
+print(status)
+" || true)
 [ "$ST" != "COMPLETED" ] && echo "Generate answers did not complete (may be slow)" && exit 1
 
 # 4) Project status after generate